@@ -0,0 +1,76 @@
+# Render farm worker, started by the TMG Camera Tools render farm
+#
+#   blender -b scene.blend --python TMG_Camera_Farm_Worker.py
+#
+# Reads one JSON task per line from stdin, renders its frames and reports
+# back on stdout. Lines meant for the farm are prefixed with "TMG_FARM ".
+
+import bpy, sys, os, json, time
+
+
+def send(**event):
+    print("TMG_FARM " + json.dumps(event), flush=True)
+
+
+def render_task(task):
+    scene = bpy.data.scenes[task["scene"]]
+    rd = scene.render
+
+    scene.camera = bpy.data.objects[task["camera"]]
+    rd.resolution_x, rd.resolution_y = task["resolution"]
+
+    if task["threads"]:
+        rd.threads_mode = 'FIXED'
+        rd.threads = task["threads"]
+
+    ## File Output nodes as the add-on would set them for this camera
+    for name, mute, base_path, slot_paths in task["outputs"]:
+        node = scene.node_tree.nodes.get(name) if scene.node_tree else None
+
+        if node is None:
+            continue
+
+        node.mute = mute
+
+        if base_path is not None:
+            node.base_path = base_path
+            for slot, path in zip(node.file_slots, slot_paths):
+                slot.path = path
+
+    for frame, filepath in zip(task["frames"], task["filepaths"]):
+        start = time.time()
+
+        try:
+            scene.frame_set(frame)
+            rd.filepath = filepath
+            result = bpy.ops.render.render(write_still=True, scene=scene.name)
+        except Exception as error:
+            send(event="failed", job=task["job"], frame=frame, error=str(error))
+            continue
+
+        if 'FINISHED' not in result or not os.path.exists(bpy.path.abspath(rd.filepath)):
+            send(event="failed", job=task["job"], frame=frame, error="Render %s" %("failed" if 'FINISHED' in result else "cancelled"))
+            continue
+
+        send(event="frame", job=task["job"], frame=frame, seconds=time.time() - start, filepath=rd.filepath)
+
+    send(event="done", job=task["job"])
+
+
+def main():
+    send(event="ready")
+
+    for line in sys.stdin:
+        line = line.strip()
+
+        if not line:
+            continue
+
+        if line == "quit":
+            break
+
+        render_task(json.loads(line))
+
+
+if __name__ == "__main__":
+    main()
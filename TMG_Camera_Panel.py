@@ -1,11 +1,22 @@
-import bpy, sys, os
+import bpy, sys, os, re, csv, json, string, queue, shutil, hashlib, subprocess, tempfile, threading, time
 from bpy_extras.io_utils import ImportHelper
 from bpy.props import StringProperty, BoolProperty, EnumProperty, IntProperty, FloatProperty, FloatVectorProperty, PointerProperty
 from bpy.types import Operator, Header
 from bpy_extras.node_utils import find_node_input
+from bpy_extras.object_utils import world_to_camera_view
+from mathutils import Vector
 from bl_ui.utils import PresetPanel
+from bpy.app.handlers import persistent
 from random import uniform, randint
-# from math import 
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+import numpy as np
+
+try:
+    import OpenImageIO as oiio
+except ImportError:
+    oiio = None
+# from math import
 
 
 # Update Blender UI Panels
@@ -18,23 +29,371 @@ def tag_redraw(context, space_type="PROPERTIES", region_type="WINDOW"):
                         region.tag_redraw()
 
 
-active_dict = {
-    "type" : "PERSP", ##[ PERSP, ORTHO, PANO ]
-    "focal_l" : 24,
-    "sensor_w" : 36,
-    "sensor_h" : 36,
-    "ortho_scale" : 6,
-    "clip_start" : 0.1,
-    "clip_end" : 100,
-    "use_dof" : True,
-    "fStop" : 2.0,
-    "track_to" : False,
-    "cam_floor" : False,
-    "cam_follow_path" : False,
-    "cam_track_to" : False,
-    "passepartout_alpha" : 0.5,
+## Sensor profile presets, cam_sensor_format -> camera values
+## divide sensor by 1.293 to get focal length (sometimes good values)
+camera_sensor_presets = {
+    '0' : {"focal_l" : 18.56, "sensor_w" : 50, "sensor_h" : 50, "ortho_scale" : 33.17},
+    '1' : {"focal_l" : 27.84, "sensor_w" : 50, "sensor_h" : 50, "ortho_scale" : 13.82},
+    '2' : {"focal_l" : 38.66, "sensor_w" : 50, "sensor_h" : 50, "ortho_scale" : 5.76},
+    '3' : {"focal_l" : 61.87, "sensor_w" : 50, "sensor_h" : 50, "ortho_scale" : 2.4},
+    '4' : {"focal_l" : 162.41, "sensor_w" : 50, "sensor_h" : 50, "ortho_scale" : 1},
+}
+
+
+## Camera names per scene, kept up to date from the depsgraph / load handlers
+## so panels don't have to walk every object in the scene on each redraw
+camera_index = {}
+
+
+## Scene names waiting for their camera list to be synced from the index
+camera_list_sync_pending = set()
+
+## Lower case names and alphabetical order of each scene's camera list
+camera_list_names = {}
+
+
+def _rebuild_camera_index(scene):
+    names = {ob.name for ob in scene.objects if ob.type == "CAMERA"}
+    camera_index[scene.name] = names
+    _queue_camera_list_sync(scene)
+    return names
+
+
+def _queue_camera_list_sync(scene):
+    ## UI lists can't be written while drawing, so sync from a timer
+    if scene.name in camera_list_sync_pending:
+        return
+
+    camera_list_sync_pending.add(scene.name)
+    scene_name = scene.name
+
+    def sync():
+        camera_list_sync_pending.discard(scene_name)
+        scene = bpy.data.scenes.get(scene_name)
+        if scene:
+            _sync_camera_list(scene)
+
+    bpy.app.timers.register(sync)
+
+
+def _sync_camera_list(scene):
+    camera_list = scene.tmg_cam_vars.camera_list
+    cameras = _get_scene_cameras(scene)
+    camera_set = set(cameras)
+    listed = set()
+
+    for i in reversed(range(len(camera_list))):
+        item = camera_list[i]
+
+        if item.camera is None or item.camera not in camera_set or item.camera in listed:
+            camera_list.remove(i)
+            continue
+
+        if item.name != item.camera.name:
+            item.name = item.camera.name
+
+        listed.add(item.camera)
+
+    for ob in cameras:
+        if ob not in listed:
+            item = camera_list.add()
+            item.name = ob.name
+            item.camera = ob
+
+    camera_list_names.pop(scene.name, None)
+
+
+def _get_camera_list_names(scene, items):
+    ## Keyed on the names the rows show, a renamed camera keeps the count
+    ## the same but must still be found and sorted under its new name
+    key = tuple(item.camera.name if item.camera else item.name for item in items)
+    cache = camera_list_names.get(scene.name)
+
+    if cache is None or cache[0] != key:
+        names = [name.lower() for name in key]
+        order = sorted(range(len(names)), key=names.__getitem__)
+        rank = [0] * len(names)
+        for i, index in enumerate(order):
+            rank[index] = i
+
+        cache = (key, names, order, rank, [names[i] for i in order])
+        camera_list_names[scene.name] = cache
+
+    return cache
+
+
+def _invalidate_camera_index(scene=None):
+    if scene:
+        camera_index.pop(scene.name, None)
+    else:
+        camera_index.clear()
+
+
+def _get_scene_cameras(scene):
+    names = camera_index.get(scene.name)
+
+    if names is None:
+        names = _rebuild_camera_index(scene)
+
+    cameras = []
+    for name in names:
+        ob = bpy.data.objects.get(name)
+
+        ## Renamed or removed outside of the add-on, rescan once
+        if ob is None or ob.type != "CAMERA":
+            return _get_scene_cameras_rebuilt(scene)
+
+        cameras.append(ob)
+
+    cameras.sort(key=lambda ob: ob.name)
+    return cameras
+
+
+def _get_scene_cameras_rebuilt(scene):
+    names = _rebuild_camera_index(scene)
+    cameras = [bpy.data.objects[name] for name in names]
+    cameras.sort(key=lambda ob: ob.name)
+    return cameras
+
+
+@persistent
+def tmg_cam_depsgraph_update(scene, depsgraph):
+    names = camera_index.get(scene.name)
+    checked = False
+
+    for update in depsgraph.updates:
+        id = update.id
+
+        if isinstance(id, bpy.types.NodeTree):
+            composite_output_index.pop(scene.name, None)
+
+        elif names is None:
+            continue
+
+        elif isinstance(id, bpy.types.Object):
+            if id.type == "CAMERA" and id.original.name not in names:
+                names.add(id.original.name)
+                _queue_camera_list_sync(scene)
+
+        elif isinstance(id, (bpy.types.Collection, bpy.types.Scene)) and not checked:
+            ## Objects were linked / unlinked. New cameras come through as
+            ## Object updates above, removed ones no longer resolve by name,
+            ## so only the indexed cameras are looked at
+            checked = True
+            removed = set()
+
+            for name in names:
+                ob = bpy.data.objects.get(name)
+                if ob is None or ob.type != "CAMERA":
+                    removed.add(name)
+
+            if removed:
+                names -= removed
+                _queue_camera_list_sync(scene)
+
+    ## Render settings live on the scene, camera sizes on the objects
+    if depsgraph.id_type_updated('SCENE'):
+        _refresh_camera_render_filepath(scene)
+
+    if depsgraph.id_type_updated('SCENE') or depsgraph.id_type_updated('OBJECT'):
+        _refresh_render_job_etas(scene)
+
+
+@persistent
+def tmg_cam_migrate_settings(dummy):
+    for ob in bpy.data.objects:
+        if ob.type == "CAMERA" and not ob.library:
+            _migrate_camera_settings(ob)
+
+
+@persistent
+def tmg_cam_load_post(dummy):
+    _invalidate_camera_index()
+    camera_list_names.clear()
+    composite_output_index.clear()
+    path_template_written.clear()
+
+
+## Render statistics, one CSV row per rendered frame next to the blend file
+render_stats_name = "tmg_cam_render_stats.csv"
+render_stats_fields = ("time", "camera", "frame", "engine", "res_x", "res_y", "samples", "wall", "sync", "sampling", "peak_mem", "status")
+render_stats_peak = re.compile(r"Peak[:\s]+([\d.]+)\s*([KMG])")
+render_stats_units = {"K" : 1 / 1024, "M" : 1.0, "G" : 1024.0}
+
+render_stats_state = {
+    "current" : None,
+    "cache" : None,
+    "mtime" : None,
+    "batch" : None,
+    "last_batch" : None,
+    "suppress" : 0,
 }
 
+
+def _render_stats_path():
+    folder = bpy.path.abspath("//") if bpy.data.filepath else tempfile.gettempdir()
+    return os.path.join(folder, render_stats_name)
+
+
+def _render_stats_write(status):
+    current = render_stats_state["current"]
+    render_stats_state["current"] = None
+
+    if current is None:
+        return
+
+    now = time.time()
+    wall = now - current["start"]
+
+    ## render_stats only fires in background sessions, the split and the
+    ## peak memory are left empty when nothing reported them
+    if current["reported"]:
+        sync = (current["sample_start"] or now) - current["start"]
+        sync_text, sampling_text, peak_text = "%.3f" %sync, "%.3f" %(wall - sync), "%.1f" %current["peak_mem"]
+    else:
+        sync = None
+        sync_text = sampling_text = peak_text = ""
+
+    row = {
+        "time" : "%.0f" %now,
+        "camera" : current["camera"],
+        "frame" : current["frame"],
+        "engine" : current["engine"],
+        "res_x" : current["res_x"],
+        "res_y" : current["res_y"],
+        "samples" : current["samples"],
+        "wall" : "%.3f" %wall,
+        "sync" : sync_text,
+        "sampling" : sampling_text,
+        "peak_mem" : peak_text,
+        "status" : status,
+    }
+
+    if render_stats_state["batch"] is not None and sync is not None:
+        render_stats_state["batch"].append(sync)
+
+    path = _render_stats_path()
+
+    try:
+        new_file = not os.path.exists(path)
+        with open(path, "a", newline="") as stats:
+            writer = csv.DictWriter(stats, fieldnames=render_stats_fields)
+            if new_file:
+                writer.writeheader()
+            writer.writerow(row)
+    except OSError:
+        pass
+
+
+def _render_batch_sync_savings():
+    ## The first render of a batch pays the full sync, without reuse every
+    ## other render would have paid about the same
+    syncs = render_stats_state["batch"]
+
+    if syncs is None:
+        syncs = render_stats_state["last_batch"]
+
+    if not syncs:
+        return None
+
+    full = syncs[0] * len(syncs)
+    return len(syncs), sum(syncs), full
+
+
+def _render_stats_summary(window):
+    ## camera -> rolling numbers over the last `window` finished frames,
+    ## re-read only when the file changes
+    path = _render_stats_path()
+
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return {}
+
+    if render_stats_state["mtime"] != (path, mtime, window):
+        rows = {}
+
+        try:
+            with open(path, newline="") as stats:
+                for row in csv.DictReader(stats):
+                    if row.get("status") == "done":
+                        rows.setdefault(row["camera"], []).append(row)
+        except (OSError, csv.Error):
+            return {}
+
+        summary = {}
+        for camera, camera_rows in rows.items():
+            camera_rows = camera_rows[-window:]
+            count = len(camera_rows)
+
+            ## Rows from interactive renders have no sync / memory figures
+            measured = [row for row in camera_rows if row["sync"]]
+            measured_wall = sum(float(row["wall"]) for row in measured)
+
+            summary[camera] = {
+                "count" : count,
+                "wall" : sum(float(row["wall"]) for row in camera_rows) / count,
+                "sync_share" : sum(float(row["sync"]) for row in measured) / measured_wall if measured_wall else None,
+                "peak_mem" : max(float(row["peak_mem"]) for row in measured) if measured else None,
+                "last" : float(camera_rows[-1]["wall"]),
+            }
+
+        render_stats_state["cache"] = summary
+        render_stats_state["mtime"] = (path, mtime, window)
+
+    return render_stats_state["cache"]
+
+
+@persistent
+def tmg_cam_render_stats_pre(scene, depsgraph=None):
+    ## Probe, tuning and optimize renders are throwaway and not recorded
+    if render_stats_state["suppress"]:
+        render_stats_state["current"] = None
+        return
+
+    rd = scene.render
+    scale = rd.resolution_percentage / 100
+
+    render_stats_state["current"] = {
+        "start" : time.time(),
+        "sample_start" : None,
+        "camera" : scene.camera.name if scene.camera else "",
+        "frame" : scene.frame_current,
+        "engine" : rd.engine,
+        "res_x" : int(rd.resolution_x * scale),
+        "res_y" : int(rd.resolution_y * scale),
+        "samples" : _render_samples(scene),
+        "peak_mem" : 0.0,
+        "reported" : False,
+    }
+
+
+@persistent
+def tmg_cam_render_stats(stats):
+    current = render_stats_state["current"]
+
+    if current is None:
+        return
+
+    current["reported"] = True
+
+    ## Everything before the first sample is scene sync / BVH build
+    if current["sample_start"] is None and ("Sample " in stats or "Rendering " in stats):
+        current["sample_start"] = time.time()
+
+    for value, unit in render_stats_peak.findall(stats):
+        current["peak_mem"] = max(current["peak_mem"], float(value) * render_stats_units[unit])
+
+
+@persistent
+def tmg_cam_render_stats_post(scene, depsgraph=None):
+    _render_stats_write("done")
+
+
+@persistent
+def tmg_cam_render_stats_cancel(scene, depsgraph=None):
+    _render_stats_write("cancelled")
+
 ###### Blender Functions #################################################################
 
 # Adapt properties editor panel to display in node editor. We have to
@@ -151,6 +510,69 @@ def draw_samples_info(layout, context):
 ###### TMG Functions #################################################################
 
 
+## Camera data written when switching cameras, (state key, owner, property)
+camera_state_props = (
+    ("type", "", "type"),
+    ("focal_l", "", "lens"),
+    ("sensor_w", "", "sensor_width"),
+    ("sensor_h", "", "sensor_height"),
+    ("ortho_scale", "", "ortho_scale"),
+    ("clip_start", "", "clip_start"),
+    ("clip_end", "", "clip_end"),
+    ("use_dof", "dof", "use_dof"),
+    ("fStop", "dof", "aperture_fstop"),
+)
+
+## Every RNA write tags the depsgraph (and restarts Cycles viewport renders),
+## so count what the change detection saved us while switching cameras.
+## Writes made anywhere else (queue, previews, File Outputs) aren't counted
+camera_state_stats = {
+    "written" : 0,
+    "skipped" : 0,
+    "switching" : False,
+}
+
+
+def _values_differ(_a, _b):
+    if isinstance(_a, float) or isinstance(_b, float):
+        return abs(_a - _b) > 1e-6 * max(1.0, abs(_b))
+    return _a != _b
+
+
+def _set_if_changed(_owner, _prop, _value):
+    switching = camera_state_stats["switching"]
+
+    if _values_differ(getattr(_owner, _prop), _value):
+        setattr(_owner, _prop, _value)
+        if switching:
+            camera_state_stats["written"] += 1
+        return True
+
+    if switching:
+        camera_state_stats["skipped"] += 1
+    return False
+
+
+def _read_camera_state(camera, state):
+    data = camera.data
+
+    for key, owner, prop in camera_state_props:
+        state[key] = getattr(getattr(data, owner) if owner else data, prop)
+
+    return state
+
+
+def _apply_camera_state(camera, state):
+    data = camera.data
+    written = 0
+
+    for key, owner, prop in camera_state_props:
+        if _set_if_changed(getattr(data, owner) if owner else data, prop, state[key]):
+            written += 1
+
+    return written
+
+
 def _change_ob(self, context, _ob):
     bpy.ops.object.select_all(action='DESELECT')
     bpy.context.view_layer.objects.active = _ob
@@ -163,47 +585,13 @@ def _change_camera_presets(self, context):
     tmg_cam_vars = scene.tmg_cam_vars
     camera = tmg_cam_vars.scene_camera
 
+    ## Start from this camera's own values so nothing leaks in from other cameras
+    state = _read_camera_state(camera, {})
+    state.update(camera_sensor_presets[tmg_cam_vars.cam_sensor_format])
     
-    ## divide sensor by 1.293 to get focal length (sometimes good values)
-    
-    if tmg_cam_vars.cam_sensor_format == '0':
-        active_dict["focal_l"] = 18.56
-        active_dict["sensor_w"] = 50
-        active_dict["sensor_h"] = 50
-        active_dict["ortho_scale"] = 33.17
-#        active_dict["fStop"] = 2.0
-        
-    if tmg_cam_vars.cam_sensor_format == '1':
-        active_dict["focal_l"] = 27.84
-        active_dict["sensor_w"] = 50
-        active_dict["sensor_h"] = 50
-        active_dict["ortho_scale"] = 13.82
-#        active_dict["fStop"] = 2.0
-        
-    if tmg_cam_vars.cam_sensor_format == '2':
-        active_dict["focal_l"] = 38.66
-        active_dict["sensor_w"] = 50
-        active_dict["sensor_h"] = 50
-        active_dict["ortho_scale"] = 5.76
-#        active_dict["fStop"] = 2.0
-        
-    if tmg_cam_vars.cam_sensor_format == '3':
-        active_dict["focal_l"] = 61.87
-        active_dict["sensor_w"] = 50
-        active_dict["sensor_h"] = 50
-        active_dict["ortho_scale"] = 2.4
-#        active_dict["fStop"] = 2.8
-        
-    if tmg_cam_vars.cam_sensor_format == '4':
-        active_dict["focal_l"] = 162.41
-        active_dict["sensor_w"] = 50
-        active_dict["sensor_h"] = 50
-        active_dict["ortho_scale"] = 1
-#        active_dict["fStop"] = 2.8
-    
-    active_dict["fStop"] = camera.data.dof.aperture_fstop
-    _set_custom_property( camera, "sensor_profile", int(tmg_cam_vars.cam_sensor_format) )
-    _set_cam_values(self, context)
+    camera.tmg_cam_settings.sensor_profile = int(tmg_cam_vars.cam_sensor_format)
+    _apply_camera_state(camera, state)
+    context.space_data.lock_camera
 
 
 def _get_aspect(_mode, _x, _y):
@@ -222,12 +610,26 @@ def _get_aspect(_mode, _x, _y):
     return tx, ty
 
 
-def _set_custom_property(_ob, _prop, _value):
-    _ob[str(_prop)] = _value
+## Per camera settings that used to live in string keyed custom properties
+camera_settings_keys = ("render_path", "render_filename", "res_x", "res_y", "resolution", "res_mode", "sensor_profile")
+
 
+def _migrate_camera_settings(_ob):
+    settings = _ob.tmg_cam_settings
 
-def _get_custom_property(_ob, _prop):
-    return _ob[str(_prop)]
+    if settings.migrated:
+        return settings
+
+    for key in camera_settings_keys:
+        if key in _ob:
+            try:
+                setattr(settings, key, type(getattr(settings, key))(_ob[key]))
+            except (TypeError, ValueError):
+                pass
+            del _ob[key]
+
+    settings.migrated = True
+    return settings
 
 
 def _get_res_preset(_mode):
@@ -270,7 +672,7 @@ def _change_resolution_presets(self, context):
         tmg_cam_vars.res_y = scene.render.resolution_y
 
     
-    _set_custom_property( camera, "resolution", int(tmg_cam_vars.cam_resolution_presets) )
+    camera.tmg_cam_settings.resolution = int(tmg_cam_vars.cam_resolution_presets)
     _set_cam_res_values(self, context)
 
 
@@ -279,7 +681,7 @@ def _change_res_mode_presets(self, context):
     tmg_cam_vars = scene.tmg_cam_vars
     camera = tmg_cam_vars.scene_camera
     
-    _set_custom_property( camera, "res_mode", int(tmg_cam_vars.cam_resolution_mode_presets) )
+    camera.tmg_cam_settings.res_mode = int(tmg_cam_vars.cam_resolution_mode_presets)
     _set_cam_res_values(self, context)
 
 
@@ -293,8 +695,8 @@ def _change_res_lock(self, context):
         scene.render.resolution_y = int(tmg_cam_vars.const_res_y)
         
     if tmg_cam_vars.cam_res_lock_modes == '1':
-        scene.render.resolution_x = _get_custom_property(camera, "res_x")
-        scene.render.resolution_y = _get_custom_property(camera, "res_y")
+        scene.render.resolution_x = camera.tmg_cam_settings.res_x
+        scene.render.resolution_y = camera.tmg_cam_settings.res_y
         
     if tmg_cam_vars.cam_res_lock_modes == '2':
         scene.render.resolution_x = int(tmg_cam_vars.res_x)
@@ -314,8 +716,8 @@ def _set_cam_res_values(self, context):
         res_x = tmp_res_x
         res_y = tmp_res_y
         
-        res = _get_custom_property(camera, "resolution")
-        mode = _get_custom_property(camera, "res_mode")
+        res = camera.tmg_cam_settings.resolution
+        mode = camera.tmg_cam_settings.res_mode
             
         if tmg_cam_vars.cam_res_lock_modes == '0':
             res_x = tmg_cam_vars.const_res_x
@@ -323,8 +725,8 @@ def _set_cam_res_values(self, context):
             tmp_di = { 'x': _get_aspect( int(tmg_cam_vars.cam_resolution_mode_presets), res_x, res_y)[0], 'y': _get_aspect( int(tmg_cam_vars.cam_resolution_mode_presets), res_x, res_y)[1] }
 
         if tmg_cam_vars.cam_res_lock_modes == '1':
-            res_x = _get_custom_property(camera, "res_x")
-            res_y = _get_custom_property(camera, "res_y")
+            res_x = camera.tmg_cam_settings.res_x
+            res_y = camera.tmg_cam_settings.res_y
             tmp_di = { 'x': _get_aspect( int(tmg_cam_vars.cam_resolution_mode_presets), res_x, res_y)[0], 'y': _get_aspect( int(tmg_cam_vars.cam_resolution_mode_presets), res_x, res_y)[1] }
 
         if tmg_cam_vars.cam_res_lock_modes == '2':
@@ -333,26 +735,122 @@ def _set_cam_res_values(self, context):
             res_y = int( tmp_di['y'] )
             tmp_di = { 'x': _get_aspect( int(tmg_cam_vars.cam_resolution_mode_presets), res_x, res_y)[0], 'y': _get_aspect( int(tmg_cam_vars.cam_resolution_mode_presets), res_x, res_y)[1] }
 
-        scene.render.resolution_x = int( tmp_di["x"] )
-        scene.render.resolution_y = int( tmp_di["y"] )
+        _set_if_changed(scene.render, "resolution_x", int( tmp_di["x"] ))
+        _set_if_changed(scene.render, "resolution_y", int( tmp_di["y"] ))
     
 
+## scene name -> (node count, names of its compositor File Output nodes),
+## dropped whenever the node tree changes
+composite_output_index = {}
+
+
+def _get_composite_outputs(scene):
+    tree = scene.node_tree
+    index = composite_output_index.get(scene.name)
+
+    if index is not None and index[0] == len(tree.nodes):
+        nodes = [tree.nodes.get(name) for name in index[1]]
+
+        ## A renamed / removed node slipped past the depsgraph, rescan once
+        if all(node is not None and node.type == 'OUTPUT_FILE' for node in nodes):
+            return nodes
+
+    nodes = [node for node in tree.nodes if node.type == 'OUTPUT_FILE']
+    composite_output_index[scene.name] = (len(tree.nodes), [node.name for node in nodes])
+    return nodes
+
+
+def _composite_output_paths(scene, camera, node):
+    ## base path -> the camera's output folder, slots -> the filename template
+    ## with {pass} as the slot's input name. Extra slots without a {pass}
+    ## token get it appended so they don't overwrite each other
+    settings = camera.tmg_cam_settings
+    base_path = _bind_path_template(settings.render_path, _path_template_values(scene, camera), hashes=True)
+
+    filename = settings.render_filename
+    if len(node.file_slots) > 1 and "{pass}" not in filename:
+        filename += "_{pass}"
+
+    slot_paths = [_bind_path_template(filename, _path_template_values(scene, camera, pass_name=input.name), hashes=True) for input in node.inputs]
+    return base_path, slot_paths
+
+
+def _composite_output_settings(scene, camera):
+    ## (node name, mute, base path, slot paths) for every File Output node
+    ## while camera renders. Nodes tagged for a camera only write for that
+    ## camera, they are muted for every other one and keep their paths
+    settings = []
+
+    if not (scene.use_nodes and scene.node_tree and camera and camera.type == "CAMERA"):
+        return settings
+
+    for node in _get_composite_outputs(scene):
+        tag = node.tmg_cam_camera
+
+        if tag is not None and tag != camera:
+            settings.append((node.name, True, None, None))
+            continue
+
+        base_path, slot_paths = _composite_output_paths(scene, camera, node)
+        settings.append((node.name, False, base_path, slot_paths))
+
+    return settings
+
+
+def _apply_composite_outputs(scene, settings):
+    nodes = scene.node_tree.nodes if scene.node_tree else {}
+
+    for name, mute, base_path, slot_paths in settings:
+        node = nodes.get(name)
+
+        if node is None:
+            continue
+
+        _set_if_changed(node, "mute", mute)
+
+        if base_path is not None:
+            _set_if_changed(node, "base_path", base_path)
+
+            for slot, path in zip(node.file_slots, slot_paths):
+                _set_if_changed(slot, "path", path)
+
+
+def _store_composite_outputs(scene):
+    if not (scene.use_nodes and scene.node_tree):
+        return []
+
+    return [(node.name, node.mute, node.base_path, [slot.path for slot in node.file_slots]) for node in _get_composite_outputs(scene)]
+
+
+def _mute_composite_outputs(scene):
+    ## For renders whose output isn't a camera's delivery (probes, tuning,
+    ## multiview), returns what _apply_composite_outputs needs to undo it
+    state = _store_composite_outputs(scene)
+    _apply_composite_outputs(scene, [(name, True, None, None) for name, mute, base_path, slot_paths in state])
+    return state
+
+
+def _sync_composite_outputs(scene, camera):
+    _apply_composite_outputs(scene, _composite_output_settings(scene, camera))
+
+
 def _update_composite_output(scene, context):
     scene = context.scene
-    tmg_cam_vars = scene.tmg_cam_vars
-
-    if scene.use_nodes:
-        for node in scene.node_tree.nodes:
-            if node.name == "File Output":
-                # print( node.path )
-                node.base_path = scene.render.filepath
-                # scene.node_tree.nodes['File Output'].file_slots['Image'].path = str( tmg_cam_vars.render_filename )
-                for slot in node.file_slots:
-                    if slot.path != tmg_cam_vars.render_filename:
-                        slot.path = tmg_cam_vars.render_filename
+    _sync_composite_outputs(scene, scene.tmg_cam_vars.scene_camera)
 
     
 def _change_scene_camera(self, context):
+    ## Counts every write the switch makes, the preset / resolution update
+    ## callbacks it sets off included
+    camera_state_stats["switching"] = True
+
+    try:
+        _switch_scene_camera(self, context)
+    finally:
+        camera_state_stats["switching"] = False
+
+
+def _switch_scene_camera(self, context):
     scene = context.scene
     tmg_cam_vars = scene.tmg_cam_vars
 
@@ -363,46 +861,14 @@ def _change_scene_camera(self, context):
         bpy.context.space_data.camera = camera
         tmg_cam_vars.camera_name = camera.name
 
-        if "render_filename" in camera:
-            pass
-        else:
-            camera["render_filename"] = str( "image" )
-
-        if "render_path" in camera:
-            pass
-        else:
-            camera["render_path"] = str( "//" )
+        _migrate_camera_settings(camera)
         
-        scene.render.filepath = camera["render_path"] + camera["render_filename"] # + get_filename_extension(self, context)
+        _apply_camera_render_filepath(scene, camera)
         _update_composite_output(scene, context)
 
-        if "res_x" in camera:
-            pass
-        else:
-            camera["res_x"] = 1920
-
-        if "res_y" in camera:
-            pass
-        else:
-            camera["res_y"] = 1080
-
-        if "resolution" in camera:
-            pass
-        else:
-            camera["resolution"] = 0
-
-        if "res_mode" in camera:
-            pass
-        else:
-            camera["res_mode"] = 0
-
-        if "sensor_profile" in camera:
-            pass
-        else:
-            camera["sensor_profile"] = 2
         
-        camera.data.passepartout_alpha = tmg_cam_vars.camera_passepartout_alpha
-        camera.data.show_passepartout = tmg_cam_vars.use_camera_passepartout_alpha
+        _set_if_changed(camera.data, "passepartout_alpha", tmg_cam_vars.camera_passepartout_alpha)
+        _set_if_changed(camera.data, "show_passepartout", tmg_cam_vars.use_camera_passepartout_alpha)
         
         if tmg_cam_vars.camera_name_lock:
             tmg_cam_vars.camera_data_name = camera.name
@@ -410,67 +876,25 @@ def _change_scene_camera(self, context):
             tmg_cam_vars.camera_data_name = camera.data.name
             
         if tmg_cam_vars.cam_res_lock_modes == '0':
-            scene.render.resolution_x = int(tmg_cam_vars.const_res_x)
-            scene.render.resolution_y = int(tmg_cam_vars.const_res_y)
+            _set_if_changed(scene.render, "resolution_x", int(tmg_cam_vars.const_res_x))
+            _set_if_changed(scene.render, "resolution_y", int(tmg_cam_vars.const_res_y))
             
         if tmg_cam_vars.cam_res_lock_modes == '1':
-            tmg_cam_vars.res_x = _get_custom_property(camera, "res_x")
-            tmg_cam_vars.res_y = _get_custom_property(camera, "res_y")
+            tmg_cam_vars.res_x = camera.tmg_cam_settings.res_x
+            tmg_cam_vars.res_y = camera.tmg_cam_settings.res_y
             
-        tmg_cam_vars.cam_sensor_format = str( _get_custom_property(camera, "sensor_profile") )
-        tmg_cam_vars.cam_resolution_presets = str( _get_custom_property(camera, "resolution") )
-        tmg_cam_vars.cam_resolution_mode_presets = str( _get_custom_property(camera, "res_mode") )
-        
-        scene.render.filepath = _get_custom_property( camera, "render_path" ) #+ tmg_cam_vars.render_filename
-        tmg_cam_vars.render_path = _get_custom_property( camera, "render_path" )
-
-        # scene.render.render_filename = _get_custom_property( camera, "render_filename" )
-        tmg_cam_vars.render_filename = _get_custom_property( camera, "render_filename" )
-
-        active_dict['type'] = camera.data.type
-        active_dict['focal_l'] = camera.data.lens 
-        active_dict['sensor_w'] = camera.data.sensor_width
-        active_dict['sensor_h'] = camera.data.sensor_height
-        active_dict['ortho_scale'] = camera.data.ortho_scale
-        active_dict['clip_start'] = camera.data.clip_start
-        active_dict['clip_end'] = camera.data.clip_end
-        active_dict['use_dof'] = camera.data.dof.use_dof
-        active_dict['fStop'] = camera.data.dof.aperture_fstop 
-#        active_dict['track_to'] = camera.data.dof.aperture_fstop
+        tmg_cam_vars.cam_sensor_format = str( camera.tmg_cam_settings.sensor_profile )
+        tmg_cam_vars.cam_resolution_presets = str( camera.tmg_cam_settings.resolution )
+        tmg_cam_vars.cam_resolution_mode_presets = str( camera.tmg_cam_settings.res_mode )
         
-        camera.data.type = active_dict['type']
-        camera.data.lens = active_dict['focal_l']     
-        camera.data.sensor_width = active_dict['sensor_w']
-        camera.data.sensor_height = active_dict['sensor_h']
-        camera.data.ortho_scale = active_dict['ortho_scale']
-        camera.data.clip_start = active_dict['clip_start']
-        camera.data.clip_end = active_dict['clip_end']
-        camera.data.dof.use_dof = active_dict['use_dof']
-        camera.data.dof.aperture_fstop = active_dict['fStop']
-        context.space_data.lock_camera
+        _apply_camera_render_filepath(scene, camera)
+        tmg_cam_vars.render_path = camera.tmg_cam_settings.render_path
 
+        # scene.render.render_filename = camera.tmg_cam_settings.render_filename
+        tmg_cam_vars.render_filename = camera.tmg_cam_settings.render_filename
 
-def _set_cam_values(self, context):
-    scene = context.scene
-    tmg_cam_vars = scene.tmg_cam_vars
-  
-    camera = tmg_cam_vars.scene_camera
-    
-    if camera:
-        active_dict['type'] = camera.data.type
-        active_dict['use_dof'] = camera.data.dof.use_dof
-        active_dict['clip_start'] = camera.data.clip_start
-        active_dict['clip_end'] = camera.data.clip_end
-        
-        camera.data.type = active_dict['type']
-        camera.data.lens = active_dict['focal_l']
-        camera.data.sensor_width = active_dict['sensor_w']
-        camera.data.sensor_height = active_dict['sensor_h']
-        camera.data.ortho_scale = active_dict['ortho_scale']
-        camera.data.clip_start = active_dict['clip_start']
-        camera.data.clip_end = active_dict['clip_end']
-        camera.data.dof.use_dof = active_dict['use_dof']
-        camera.data.dof.aperture_fstop = active_dict['fStop']
+        _apply_sampling_tune(scene, camera)
+        _apply_performance_tune(scene, camera)
         context.space_data.lock_camera
 
 
@@ -478,6 +902,18 @@ def _tmg_search_cameras(self, object):
     return object.type == 'CAMERA'
 
 
+def _camera_list_index_changed(self, context):
+    scene = context.scene
+    tmg_cam_vars = scene.tmg_cam_vars
+
+    if 0 <= tmg_cam_vars.camera_list_index < len(tmg_cam_vars.camera_list):
+        camera = tmg_cam_vars.camera_list[tmg_cam_vars.camera_list_index].camera
+
+        if camera and camera != tmg_cam_vars.scene_camera:
+            bpy.context.space_data.camera = camera
+            tmg_cam_vars.scene_camera = camera
+
+
 def _set_render_slot(self, context):
     scene = context.scene
     tmg_cam_vars = scene.tmg_cam_vars
@@ -696,16 +1132,16 @@ def _update_res_x(self, context):
     scene = context.scene
     tmg_cam_vars = scene.tmg_cam_vars
     camera = tmg_cam_vars.scene_camera
-    _set_custom_property( camera, "res_x", int(tmg_cam_vars.res_x) )
-    scene.render.resolution_x = int( _get_custom_property(camera, "res_x") )
+    camera.tmg_cam_settings.res_x = int(tmg_cam_vars.res_x)
+    scene.render.resolution_x = int( camera.tmg_cam_settings.res_x )
  
     
 def _update_res_y(self, context):
     scene = context.scene
     tmg_cam_vars = scene.tmg_cam_vars
     camera = tmg_cam_vars.scene_camera
-    _set_custom_property( camera, "res_y", int(tmg_cam_vars.res_y) )
-    scene.render.resolution_y = int( _get_custom_property(camera, "res_y") )
+    camera.tmg_cam_settings.res_y = int(tmg_cam_vars.res_y)
+    scene.render.resolution_y = int( camera.tmg_cam_settings.res_y )
 
 
 def _update_const_res_x(self, context):
@@ -741,66 +1177,100 @@ def _rand_int_range(_start, _end):
     return randint(_start, _end)
 
 
-def _randomize_lighting(self, context, ob):
-    scene = context.scene
+## (toggle, property on every Light) written in bulk, the toggle name is
+## also the prefix of its _min / _max settings
+light_random_props = (
+    ("light_random_energy", "energy"),
+    ("light_random_diffuse", "diffuse_factor"),
+    ("light_random_specular", "specular_factor"),
+    ("light_random_volume", "volume_factor"),
+)
+
+## Size properties only exist on some light types, set per light
+light_random_size_props = {
+    "POINT" : ("shadow_soft_size",),
+    "AREA" : ("size",),
+    "SPOT" : ("shadow_soft_size", "spot_size", "spot_blend"),
+}
+
+
+def _random_light_range(tmg_cam_vars, prefix):
+    return getattr(tmg_cam_vars, prefix + "_min"), getattr(tmg_cam_vars, prefix + "_max")
+
+
+def _randomize_lights(scene, lights, rng=None):
+    ## All values are drawn with numpy in one go, the Light collection is read
+    ## and written back with foreach_get / foreach_set so the cost stays flat
+    ## however many lights are selected
     tmg_cam_vars = scene.tmg_cam_vars
-    light_types = []
+    rng = np.random.default_rng() if rng is None else rng
+    count = len(lights)
+
+    if not count:
+        return
 
+    all_lights = bpy.data.lights
+    index = {light.name_full : i for i, light in enumerate(all_lights)}
+    rows = np.fromiter((index[light.name_full] for light in lights), dtype=np.int64, count=count)
+    total = len(all_lights)
+
+    ## Type first, the size properties below depend on it
     if tmg_cam_vars.light_random_type:
-        if tmg_cam_vars.light_random_type_point:
-            light_types.append("POINT")
+        light_types = [light_type for light_type, use in (
+            ("POINT", tmg_cam_vars.light_random_type_point),
+            ("SUN", tmg_cam_vars.light_random_type_sun),
+            ("SPOT", tmg_cam_vars.light_random_type_spot),
+            ("AREA", tmg_cam_vars.light_random_type_area)) if use]
+
+        if light_types:
+            for light, choice in zip(lights, rng.integers(0, len(light_types), count)):
+                if light.type != light_types[choice]:
+                    light.type = light_types[choice]
 
-        if tmg_cam_vars.light_random_type_sun:
-            light_types.append("SUN")
+            ## Wrappers made before the type change keep the old subtype
+            ## (a PointLight has no spot_size), so look the lights up again
+            lights = [all_lights[light.name_full] for light in lights]
 
-        if tmg_cam_vars.light_random_type_spot:
-            light_types.append("SPOT")
+    if tmg_cam_vars.light_random_color:
+        colors = np.empty(total * 3, dtype=np.float32)
+        all_lights.foreach_get("color", colors)
+        colors = colors.reshape(total, 3)
 
-        if tmg_cam_vars.light_random_type_area:
-            light_types.append("AREA")
+        low = [tmg_cam_vars.light_random_color_r_min, tmg_cam_vars.light_random_color_g_min, tmg_cam_vars.light_random_color_b_min]
+        high = [tmg_cam_vars.light_random_color_r_max, tmg_cam_vars.light_random_color_g_max, tmg_cam_vars.light_random_color_b_max]
+        colors[rows] = rng.uniform(low, high, (count, 3))
 
-        if len(light_types) > 0 and tmg_cam_vars.light_random_type:
-            ob.data.type = light_types[ _rand_int_range(0, len( light_types )-1 ) ]
+        all_lights.foreach_set("color", colors.ravel())
 
-    light = ob.data
+    for toggle, prop in light_random_props:
+        if not getattr(tmg_cam_vars, toggle):
+            continue
+
+        values = np.empty(total, dtype=np.float32)
+        all_lights.foreach_get(prop, values)
+        values[rows] = rng.uniform(*_random_light_range(tmg_cam_vars, toggle), count)
+        all_lights.foreach_set(prop, values)
 
-    ## Check color lock
-    if tmg_cam_vars.light_random_color:
-        light.color.r = uniform(tmg_cam_vars.light_random_color_r_min, tmg_cam_vars.light_random_color_r_max)
-        light.color.g = uniform(tmg_cam_vars.light_random_color_g_min, tmg_cam_vars.light_random_color_g_max)
-        light.color.b = uniform(tmg_cam_vars.light_random_color_b_min, tmg_cam_vars.light_random_color_b_max)
-        
-    ## Check energy lock
-    if tmg_cam_vars.light_random_energy:
-        light.energy = uniform(tmg_cam_vars.light_random_energy_min, tmg_cam_vars.light_random_energy_max)
-    
-    ## Check diffuse lock
-    if tmg_cam_vars.light_random_diffuse:
-        light.diffuse_factor = uniform(tmg_cam_vars.light_random_diffuse_min, tmg_cam_vars.light_random_diffuse_max)
-            
-    # return _list
-    ## Check specular lock
-    if tmg_cam_vars.light_random_specular:
-        light.specular_factor = uniform(tmg_cam_vars.light_random_specular_min, tmg_cam_vars.light_random_specular_max)
-        
-    ## Check volume lock
-    if tmg_cam_vars.light_random_volume:
-        light.volume_factor = uniform(tmg_cam_vars.light_random_volume_min, tmg_cam_vars.light_random_volume_max)
-        
-    ## Check size lock
     if tmg_cam_vars.light_random_size:
-        if ob.data.type == "POINT":
-            light.shadow_soft_size = uniform(tmg_cam_vars.light_random_size_min, tmg_cam_vars.light_random_size_max)
-            
-        if ob.data.type == "AREA":
-            light.size = uniform(tmg_cam_vars.light_random_size_min, tmg_cam_vars.light_random_size_max)
-            
-        if ob.data.type == "SPOT":
-            light.shadow_soft_size = uniform(tmg_cam_vars.light_random_size_min, tmg_cam_vars.light_random_size_max)
-            light.spot_size = uniform(tmg_cam_vars.light_random_size_min, tmg_cam_vars.light_random_size_max)
-            light.spot_blend = uniform(tmg_cam_vars.light_random_size_min, tmg_cam_vars.light_random_size_max)
+        low, high = _random_light_range(tmg_cam_vars, "light_random_size")
+
+        ## Grouped by type so each group draws its values at once
+        groups = {}
+        for light in lights:
+            if light.type in light_random_size_props:
+                groups.setdefault(light.type, []).append(light)
+
+        for light_type, group in groups.items():
+            props = light_random_size_props[light_type]
+            values = rng.uniform(low, high, (len(group), len(props)))
 
-    return {'FINISHED'}
+            for light, row in zip(group, values.tolist()):
+                for prop, value in zip(props, row):
+                    setattr(light, prop, value)
+
+    ## foreach_set skips the usual update notifications
+    for light in lights:
+        light.update_tag()
 
 
 def _render_path_changed(self, context):
@@ -808,10 +1278,9 @@ def _render_path_changed(self, context):
     tmg_cam_vars = scene.tmg_cam_vars
     camera = tmg_cam_vars.scene_camera
 
-    _set_custom_property( camera, "render_path", str( tmg_cam_vars.render_path ) )
-    tmg_cam_vars.render_filename = camera["render_filename"] 
-    # scene.render.filepath = _get_custom_property(camera, "render_path") + tmg_cam_vars.render_filename
-    scene.render.filepath = camera["render_path"] #+ camera["render_filename"] # + get_filename_extension(self, context)
+    camera.tmg_cam_settings.render_path = str( tmg_cam_vars.render_path )
+    tmg_cam_vars.render_filename = camera.tmg_cam_settings.render_filename 
+    _apply_camera_render_filepath(scene, camera)
     _update_composite_output(scene, context)
 
 
@@ -859,41 +1328,2396 @@ def get_filename_extension(self, context):
     return fileext
 
 
+## Output path templates, e.g. "//renders/{camera}/{res}_{frame:04}"
+##   {camera} {scene} {frame} {res} {engine} {pass}
+## Templates are parsed once, then bound per camera / job to a plain format
+## string with only the frame left, so expanding whole frame ranges is a
+## single str.format per frame
+path_template_tokens = {"camera", "scene", "frame", "res", "engine", "pass"}
+path_template_engines = {
+    "CYCLES" : "cycles",
+    "BLENDER_EEVEE" : "eevee",
+    "BLENDER_EEVEE_NEXT" : "eevee",
+    "BLENDER_WORKBENCH" : "workbench",
+}
+
+path_template_cache = {}
+path_template_bound = {}
+
+## scene name -> the filepath last written from the camera's template, only
+## that path is expanded again when the render settings change
+path_template_written = {}
+
+
+def _compile_path_template(template):
+    compiled = path_template_cache.get(template)
+
+    if compiled is None:
+        parts = []
+
+        try:
+            for literal, field, spec, conversion in string.Formatter().parse(template):
+                if field is not None and field not in path_template_tokens:
+                    ## Unknown tokens stay as written
+                    literal += "{" + field + (":" + spec if spec else "") + "}"
+                    field = None
+                parts.append((literal, field, spec))
+        except ValueError:
+            ## Unbalanced braces, treat the whole thing as a plain path
+            parts = [(template, None, "")]
+
+        compiled = (tuple(parts), any(part[1] == "frame" for part in parts))
+        path_template_cache[template] = compiled
+
+    return compiled
+
+
+def _bind_path_template(template, values, hashes=False):
+    ## values : (camera, scene, res, engine, pass), the result is a format
+    ## string taking the frame, or a Blender style #### path with hashes
+    key = (template, values, hashes)
+    bound = path_template_bound.get(key)
+
+    if bound is not None:
+        return bound
+
+    parts, has_frame = _compile_path_template(template)
+    tokens = dict(zip(("camera", "scene", "res", "engine", "pass"), values))
+    bound = ""
+
+    for literal, field, spec in parts:
+        bound += literal if hashes else literal.replace("{", "{{").replace("}", "}}")
+
+        if field == "frame":
+            width = int(spec.lstrip("0") or 0) if spec.isdigit() else 4
+            bound += "#" * max(1, width) if hashes else "{0:%s}" %(spec or "04")
+        elif field:
+            try:
+                value = format(tokens[field], spec)
+            except ValueError:
+                value = tokens[field]
+            bound += value if hashes else value.replace("{", "{{").replace("}", "}}")
+
+    ## No frame token, number the frame like Blender does
+    if not has_frame and not hashes:
+        if "#" in bound:
+            start = bound.rindex("#")
+            end = start + 1
+            while start > 0 and bound[start - 1] == "#":
+                start -= 1
+            bound = bound[:start] + "{0:0%sd}" %(end - start) + bound[end:]
+        else:
+            bound += "{0:04d}"
+
+    if len(path_template_bound) > 4096:
+        path_template_bound.clear()
+    path_template_bound[key] = bound
+    return bound
+
+
+def _path_template_values(scene, camera, res_x=None, res_y=None, pass_name="combined"):
+    rd = scene.render
+    res_x = rd.resolution_x if res_x is None else res_x
+    res_y = rd.resolution_y if res_y is None else res_y
+
+    return (bpy.path.clean_name(camera.name), bpy.path.clean_name(scene.name), "%sx%s" %(int(res_x), int(res_y)),
+            path_template_engines.get(rd.engine, rd.engine.lower()), bpy.path.clean_name(pass_name))
+
+
+def _expand_render_paths(scene, template, values, frames):
+    rd = scene.render
+    ext = rd.file_extension if rd.use_file_extension else ""
+    bound = _bind_path_template(template, values) + ext.replace("{", "{{").replace("}", "}}")
+    return [bound.format(frame) for frame in frames]
+
+
+def _camera_path_template(camera):
+    settings = camera.tmg_cam_settings
+    return settings.render_path + settings.render_filename
+
+
+def _camera_render_filepath(scene, camera):
+    ## scene.render.filepath for normal renders, frames as ####
+    return _bind_path_template(_camera_path_template(camera), _path_template_values(scene, camera), hashes=True)
+
+
+def _apply_camera_render_filepath(scene, camera):
+    filepath = _camera_render_filepath(scene, camera)
+    _set_if_changed(scene.render, "filepath", filepath)
+    path_template_written[scene.name] = filepath
+
+
 def _render_filename_changed(self, context):
     scene = context.scene
     tmg_cam_vars = scene.tmg_cam_vars
     camera = tmg_cam_vars.scene_camera
 
-    _set_custom_property( camera, "render_filename", str( tmg_cam_vars.render_filename ) )
-    _set_custom_property( camera, "render_path", str( tmg_cam_vars.render_path ) )
-    scene.render.filepath = camera["render_path"] #+ camera["render_filename"] # + get_filename_extension(self, context)
+    camera.tmg_cam_settings.render_filename = str( tmg_cam_vars.render_filename )
+    camera.tmg_cam_settings.render_path = str( tmg_cam_vars.render_path )
+    _apply_camera_render_filepath(scene, camera)
     _update_composite_output(scene, context)
 
 
-class OBJECT_OT_TMG_Cam_Randomize_Selected_Light(bpy.types.Operator):
-    """Randomizes selected light values"""
-    bl_idname = 'object.tmg_randomize_light'
-    bl_label = 'Randomize'
-    bl_options = {'REGISTER', 'UNDO'}
-    
-    def execute(self, context):
-        scene = context.scene
-        tmg_cam_vars = scene.tmg_cam_vars
+def _refresh_camera_render_filepath(scene):
+    ## {res} / {engine} follow the render settings, so the template is
+    ## expanded again when the scene changes. Paths edited by hand, queue
+    ## units and internal probe renders are left alone
+    if render_queue_state["running"] or render_stats_state["suppress"]:
+        return
+
+    camera = scene.camera
+    written = path_template_written.get(scene.name)
+
+    if camera is None or camera.type != "CAMERA" or written != scene.render.filepath:
+        return
+
+    if _camera_render_filepath(scene, camera) != written:
+        _apply_camera_render_filepath(scene, camera)
+        _sync_composite_outputs(scene, camera)
+
+## Render queue currently running, one (job index, frame) unit per render
+render_queue_state = {
+    "running" : False,
+    "cancel" : False,
+    "units" : [],
+    "remaining" : {},
+    "done" : 0,
+    "total" : 0,
+    "restore" : None,
+}
 
-        if bpy.context.active_object.type == "LIGHT":
-            _randomize_lighting(self, context, bpy.context.active_object)
 
-        for ob in bpy.context.selected_objects:
-            if ob.type == "LIGHT" and ob != bpy.context.active_object:
-                _randomize_lighting(self, context, ob)
+def _render_job_frames(scene, job):
+    if job.use_animation:
+        return range(job.frame_start, job.frame_end + 1, max(1, scene.frame_step))
+    return [scene.frame_current]
 
-        return {'FINISHED'}
+
+def _render_job_path(job):
+    settings = job.camera.tmg_cam_settings
+
+    if job.render_path:
+        return job.render_path + settings.render_filename
+    return settings.render_path + settings.render_filename
+
+
+def _render_job_paths(scene, job, frames):
+    res_x, res_y = _render_job_resolution(scene, job)
+    values = _path_template_values(scene, job.camera, res_x, res_y)
+    return _expand_render_paths(scene, _render_job_path(job), values, frames)
+
+
+def _render_job_resolution(scene, job):
+    settings = job.camera.tmg_cam_settings
+
+    if job.resolution == 'SCENE':
+        return scene.render.resolution_x, scene.render.resolution_y
+
+    if job.resolution == 'CAMERA':
+        return settings.res_x, settings.res_y
+
+    res_x, res_y = _get_res_preset(int(job.resolution))
+    return _get_aspect(settings.res_mode, res_x, res_y)
+
+
+def _store_render_state(scene):
+    rd = scene.render
+    return {
+        "camera" : scene.camera,
+        "filepath" : rd.filepath,
+        "resolution_x" : rd.resolution_x,
+        "resolution_y" : rd.resolution_y,
+        "frame" : scene.frame_current,
+        "persistent" : rd.use_persistent_data,
+        "outputs" : _store_composite_outputs(scene),
+    }
+
+
+def _restore_render_state(scene, state):
+    rd = scene.render
+    scene.camera = state["camera"]
+    _set_if_changed(rd, "filepath", state["filepath"])
+    _set_if_changed(rd, "resolution_x", state["resolution_x"])
+    _set_if_changed(rd, "resolution_y", state["resolution_y"])
+    _set_if_changed(rd, "use_persistent_data", state["persistent"])
+    _apply_composite_outputs(scene, state["outputs"])
+    scene.frame_set(state["frame"])
+
+
+## Append only journal written next to each camera's renders, used to resume
+## a batch that died part way through
+render_journal_name = "tmg_cam_journal.jsonl"
+
+
+def _render_journal_path(job):
+    ## Jobs live on the scene, job.id_data is that scene. The folder comes
+    ## from the job's own first frame, not whatever frame is current
+    scene = job.id_data
+    frames = _render_job_frames(scene, job)
+    first = frames[0] if len(frames) else scene.frame_current
+    return os.path.join(os.path.dirname(bpy.path.abspath(_render_job_paths(scene, job, [first])[0])), render_journal_name)
+
+
+def _render_journal_key(job):
+    ## Jobs sharing a folder and camera are told apart by template and size
+    res_x, res_y = _render_job_resolution(job.id_data, job)
+    return "%s|%s|%sx%s" %(job.camera.name, _render_job_path(job), int(res_x), int(res_y))
+
+
+def _render_journal_write(job, **record):
+    path = _render_journal_path(job)
+    record["camera"] = job.camera.name
+    record["job"] = _render_journal_key(job)
+    record["time"] = time.time()
+
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "a") as journal:
+            journal.write(json.dumps(record) + "\n")
+            journal.flush()
+            os.fsync(journal.fileno())
+    except OSError:
+        pass
+
+
+def _render_journal_completed(job):
+    ## frame -> output file of every frame the journal says finished
+    completed = {}
+    key = _render_journal_key(job)
+
+    try:
+        with open(_render_journal_path(job)) as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    ## Half written line from a crash
+                    continue
+
+                if record.get("camera") != job.camera.name or record.get("job", key) != key:
+                    continue
+
+                if record.get("event") == "frame":
+                    completed[record["frame"]] = record["filepath"]
+                elif record.get("event") == "failed":
+                    completed.pop(record["frame"], None)
+    except OSError:
+        pass
+
+    return completed
+
+
+def _render_output_exists(filepath):
+    try:
+        return os.path.getsize(filepath) > 0
+    except OSError:
+        return False
+
+
+def _render_job_pending_frames(scene, job, resume=False):
+    frames = list(_render_job_frames(scene, job))
+
+    if resume:
+        completed = _render_journal_completed(job)
+        frames = [frame for frame in frames if not (frame in completed and _render_output_exists(completed[frame]))]
+
+    return frames
+
+
+## Content addressed render cache, outputs are stored under a fingerprint of
+## everything the camera sees so unchanged cameras can skip rendering.
+##
+## The scene part is hashed once per queue run from the evaluated depsgraphs
+## of the scene's own view layers (geometry after modifiers / armatures,
+## materials and node groups, lights, world, compositor, collection
+## visibility and all keyframes / drivers), a frame is then just that hash
+## plus the job and the frame number. Scenes with simulations, geometry
+## nodes or other time dependent modifiers are only cached at the frame the
+## geometry was hashed at. Not detected: image files changed on disk under
+## the same path, UVs and custom attributes, linked library edits and Python
+## drivers that read outside state.
+render_cache_state = {
+    "hits" : 0,
+    "misses" : 0,
+    "pending" : {},
+    "scene" : None,
+}
+
+
+def _hash_update(digest, *values):
+    for value in values:
+        if hasattr(value, "__len__") and not isinstance(value, str):
+            value = tuple(value)
+        digest.update(repr(value).encode())
+        digest.update(b"|")
+
+
+def _node_tree_signature(digest, tree, seen):
+    ## Node groups are followed once each, they can be shared between trees
+    if tree is None or tree.name_full in seen:
+        return
+
+    seen.add(tree.name_full)
+
+    for node in tree.nodes:
+        _hash_update(digest, node.name, node.bl_idname, node.mute)
+
+        if getattr(node, "image", None):
+            _hash_update(digest, node.image.name_full, node.image.filepath)
+
+        if getattr(node, "node_tree", None):
+            _node_tree_signature(digest, node.node_tree, seen)
+
+        for input in node.inputs:
+            if not input.is_linked and hasattr(input, "default_value"):
+                _hash_update(digest, input.name, input.default_value)
+
+    for link in tree.links:
+        _hash_update(digest, link.from_node.name, link.from_socket.identifier, link.to_node.name, link.to_socket.identifier)
+
+
+def _material_signature(material):
+    digest = hashlib.sha1()
+    _hash_update(digest, material.name_full, material.diffuse_color, material.roughness, material.metallic)
+
+    if material.use_nodes:
+        _node_tree_signature(digest, material.node_tree, set())
+
+    return digest.hexdigest()
+
+
+def _mesh_signature(mesh):
+    digest = hashlib.sha1()
+    co = np.empty(len(mesh.vertices) * 3, dtype=np.float32)
+    mesh.vertices.foreach_get("co", co)
+    indices = np.empty(len(mesh.loops), dtype=np.int32)
+    mesh.loops.foreach_get("vertex_index", indices)
+
+    digest.update(co.tobytes())
+    digest.update(indices.tobytes())
+    return digest.hexdigest()
+
+
+def _animation_signature(digest):
+    for action in bpy.data.actions:
+        if not action.users:
+            continue
+
+        for fcurve in getattr(action, "fcurves", ()):
+            keys = np.empty(len(fcurve.keyframe_points) * 2, dtype=np.float32)
+            fcurve.keyframe_points.foreach_get("co", keys)
+            _hash_update(digest, action.name_full, fcurve.data_path, fcurve.array_index, fcurve.mute)
+            digest.update(keys.tobytes())
+
+    for ob in bpy.data.objects:
+        if ob.animation_data:
+            for driver in ob.animation_data.drivers:
+                _hash_update(digest, ob.name_full, driver.data_path, driver.array_index, driver.driver.expression)
+
+
+def _layer_collection_signature(digest, layer_collection):
+    _hash_update(digest, layer_collection.name, layer_collection.exclude, layer_collection.collection.hide_render)
+
+    for child in layer_collection.children:
+        _layer_collection_signature(digest, child)
+
+
+## Modifiers whose result can change from frame to frame with nothing the
+## signature hashes changing, geometry nodes can read the scene time
+render_cache_time_modifiers = {
+    'NODES', 'CLOTH', 'SOFT_BODY', 'FLUID', 'DYNAMIC_PAINT', 'OCEAN', 'PARTICLE_SYSTEM', 'EXPLODE',
+    'WAVE', 'BUILD', 'MESH_CACHE', 'MESH_SEQUENCE_CACHE', 'SURFACE_DEFORM', 'COLLISION',
+}
+
+
+def _render_scene_signature(scene):
+    ## Camera independent part of the fingerprint, once per queue run.
+    ## Returns (signature, frame, time dependent), the evaluated geometry is
+    ## only hashed at that frame so time dependent scenes can't reuse other
+    ## frames from the cache
+    view_layers = [view_layer for view_layer in scene.view_layers if view_layer.use] or list(scene.view_layers[:1])
+    digest = hashlib.sha1()
+    data = {}
+    materials = {}
+    time_dependent = scene.rigidbody_world is not None and scene.rigidbody_world.enabled
+
+    if scene.world:
+        _hash_update(digest, scene.world.name_full, scene.world.color)
+        if scene.world.use_nodes:
+            _node_tree_signature(digest, scene.world.node_tree, set())
+
+    if scene.render.use_compositing and scene.use_nodes:
+        _node_tree_signature(digest, scene.node_tree, set())
+
+    _animation_signature(digest)
+
+    for view_layer in view_layers:
+        _hash_update(digest, view_layer.name)
+        _layer_collection_signature(digest, view_layer.layer_collection)
+
+        depsgraph = view_layer.depsgraph
+        depsgraph.update()
+
+        for instance in depsgraph.object_instances:
+            time_dependent = _render_instance_signature(digest, instance, data, materials) or time_dependent
+
+    return digest.hexdigest(), scene.frame_current, time_dependent
+
+
+def _render_instance_signature(digest, instance, data, materials):
+    ## Returns True when the object's geometry may change over time
+    ob = instance.object
+    original = ob.original
+
+    if original.hide_render or ob.type == "CAMERA":
+        return False
+
+    time_dependent = original.rigid_body is not None or any(modifier.type in render_cache_time_modifiers for modifier in original.modifiers)
+
+    _hash_update(digest, original.name_full, ob.type, instance.matrix_world)
+
+    ## Evaluated data, shared data is hashed once
+    if ob.data is not None:
+        key = ob.data.as_pointer()
+
+        if key not in data:
+            if ob.type == "MESH":
+                data[key] = _mesh_signature(ob.data)
+            else:
+                data[key] = repr(tuple(tuple(corner) for corner in ob.bound_box))
+
+            if ob.type == "LIGHT":
+                light = ob.data
+                data[key] += repr((light.type, tuple(light.color), light.energy, light.shadow_soft_size))
+
+        _hash_update(digest, data[key])
+
+    for slot in ob.material_slots:
+        material = slot.material
+
+        if material is None:
+            continue
+
+        if material.name_full not in materials:
+            materials[material.name_full] = _material_signature(material.original)
+
+        _hash_update(digest, materials[material.name_full])
+
+    return time_dependent
+
+
+def _render_job_signature(scene, job, scene_signature):
+    ## Everything a job adds on top of the scene, the camera's own animation
+    ## is part of the scene signature
+    digest = hashlib.sha1()
+    rd = scene.render
+    camera = job.camera
+    cam = camera.data
+    res_x, res_y = _render_job_resolution(scene, job)
+
+    _hash_update(digest, scene_signature)
+
+    ## Camera
+    _hash_update(digest, camera.name_full, camera.matrix_world, cam.type, cam.lens, cam.lens_unit, cam.sensor_fit,
+                 cam.sensor_width, cam.sensor_height, cam.ortho_scale, cam.shift_x, cam.shift_y, cam.clip_start, cam.clip_end,
+                 cam.dof.use_dof, cam.dof.focus_distance, cam.dof.aperture_fstop,
+                 cam.dof.focus_object.name_full if cam.dof.focus_object else "")
+
+    ## Render settings the add-on manages
+    _hash_update(digest, rd.engine, int(res_x), int(res_y), rd.resolution_percentage,
+                 rd.film_transparent, rd.use_border, rd.border_min_x, rd.border_min_y, rd.border_max_x, rd.border_max_y,
+                 rd.image_settings.file_format, rd.image_settings.color_mode, rd.image_settings.color_depth,
+                 scene.view_settings.view_transform, scene.view_settings.look, scene.view_settings.exposure, scene.view_settings.gamma)
+
+    if rd.engine == "CYCLES":
+        cscene = scene.cycles
+        _hash_update(digest, cscene.samples, cscene.use_adaptive_sampling, cscene.adaptive_threshold, cscene.adaptive_min_samples,
+                     cscene.use_denoising, cscene.denoiser, cscene.seed, cscene.use_animated_seed, cscene.max_bounces)
+    else:
+        _hash_update(digest, scene.eevee.taa_render_samples)
+
+    return digest.hexdigest()
+
+
+def _render_fingerprint(job_signature, frame):
+    return hashlib.sha1(("%s|%s" %(job_signature, frame)).encode()).hexdigest()
+
+
+def _render_cache_path(scene, fingerprint):
+    folder = bpy.path.abspath(scene.tmg_cam_vars.render_cache_path)
+    return os.path.join(folder, fingerprint + scene.render.file_extension)
+
+
+def _render_cache_store(source, target):
+    try:
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        shutil.copyfile(source, target)
+    except OSError:
+        pass
+
+
+def _render_cache_reset():
+    render_cache_state["hits"] = 0
+    render_cache_state["misses"] = 0
+    render_cache_state["pending"] = {}
+    render_cache_state["scene"] = None
+
+
+def _render_cache_filter(scene, index, job, frames):
+    ## Copies cached outputs into place and returns the frames that still
+    ## need rendering, their fingerprints are kept until they finish
+    if render_cache_state["scene"] is None:
+        render_cache_state["scene"] = _render_scene_signature(scene)
+
+    scene_signature, signature_frame, time_dependent = render_cache_state["scene"]
+    job_signature = _render_job_signature(scene, job, scene_signature)
+    missing = []
+
+    for frame, filepath in zip(frames, _render_job_paths(scene, job, frames)):
+        ## Geometry that changes over time was only hashed at one frame,
+        ## every other frame is rendered and never cached
+        if time_dependent and frame != signature_frame:
+            render_cache_state["misses"] += 1
+            missing.append(frame)
+            continue
+
+        fingerprint = _render_fingerprint(job_signature, frame)
+        cached = _render_cache_path(scene, fingerprint)
+        filepath = bpy.path.abspath(filepath)
+
+        if _render_output_exists(cached):
+            _render_cache_store(cached, filepath)
+            render_cache_state["hits"] += 1
+            _render_journal_write(job, event="frame", frame=frame, filepath=filepath, cached=fingerprint)
+            continue
+
+        render_cache_state["misses"] += 1
+        render_cache_state["pending"][(index, frame)] = cached
+        missing.append(frame)
+
+    return missing
+
+
+def _render_cache_finished(index, frame, filepath):
+    cached = render_cache_state["pending"].pop((index, frame), None)
+
+    if cached and _render_output_exists(filepath):
+        _render_cache_store(filepath, cached)
+
+
+def _render_cache_hit_rate():
+    total = render_cache_state["hits"] + render_cache_state["misses"]
+    return render_cache_state["hits"], total
+
+
+def _queue_render_units(scene, jobs, resume=False):
+    units = []
+    use_cache = scene.tmg_cam_vars.use_render_cache
+    _render_cache_reset()
+
+    for index, job in enumerate(jobs):
+        if job.use and job.camera and job.camera.type == "CAMERA":
+            frames = _render_job_pending_frames(scene, job, resume)
+
+            if use_cache and frames:
+                frames = _render_cache_filter(scene, index, job, frames)
+
+            if not frames:
+                job.status = 'DONE'
+                continue
+
+            job.status = 'QUEUED'
+            _render_journal_write(job, event="start", frames=frames)
+            for frame in frames:
+                units.append((index, frame))
+        else:
+            job.status = 'SKIPPED'
+
+    if scene.tmg_cam_vars.use_batch_grouping:
+        units = _group_render_units(scene, jobs, units)
+
+    return units
+
+
+def _group_render_units(scene, jobs, units):
+    ## Renders sharing a frame and resolution only differ by camera, so
+    ## with persistent data on they reuse one scene sync / BVH build
+    def key(unit):
+        index, frame = unit
+        res_x, res_y = _render_job_resolution(scene, jobs[index])
+        return frame, int(res_x), int(res_y)
+
+    return sorted(units, key=key)
+
+
+def _begin_render_batch(scene):
+    render_stats_state["batch"] = []
+
+    if scene.tmg_cam_vars.use_batch_grouping:
+        _set_if_changed(scene.render, "use_persistent_data", True)
+
+
+def _end_render_batch():
+    ## Renders after the queue are not part of the batch, persistent data
+    ## itself comes back with _restore_render_state
+    render_stats_state["last_batch"] = render_stats_state["batch"]
+    render_stats_state["batch"] = None
+
+
+## Async output, pixels are copied out of the compositor viewer and encoded
+## on a small thread pool while the next frame renders. Capped by the bytes
+## waiting to be written so a fast renderer can't fill memory
+render_output_viewer = "TMG_Cam_Output_Viewer"
+render_output_codecs = {
+    "NONE" : "none",
+    "ZIP" : "zip",
+    "ZIPS" : "zips",
+    "PIZ" : "piz",
+    "PXR24" : "pxr24",
+    "RLE" : "rle",
+    "B44" : "b44",
+    "B44A" : "b44a",
+    "DWAA" : "dwaa",
+    "DWAB" : "dwab",
+}
+
+render_output_state = {
+    "pool" : None,
+    "workers" : 0,
+    "pending" : [],
+    "bytes" : 0,
+    "scene" : None,
+    "viewer" : None,
+}
+
+
+def _render_output_supported(scene):
+    ## Without compositing the viewer keeps the pixels of an older render
+    if oiio is None or not scene.render.use_compositing or not scene.use_nodes or scene.node_tree is None:
+        return False
+
+    settings = scene.render.image_settings
+
+    ## Per output colour management overrides aren't applied here
+    if settings.color_mode == 'BW' or getattr(settings, "color_management", 'FOLLOW_SCENE') == 'OVERRIDE':
+        return False
+
+    if settings.file_format == 'OPEN_EXR':
+        return True
+
+    ## Display referred formats need the whole view transform, only plain
+    ## Standard on an sRGB display is simple enough to apply here
+    view = scene.view_settings
+    return (settings.file_format == 'PNG' and scene.display_settings.display_device == 'sRGB'
+            and view.view_transform == 'Standard' and view.look in {'None', ''}
+            and view.exposure == 0.0 and view.gamma == 1.0 and not view.use_curve_mapping)
+
+
+def _render_output_ensure_viewer(scene):
+    ## Whatever is added here is taken out again by _render_output_restore_viewer
+    tree = scene.node_tree
+    viewer = tree.nodes.get(render_output_viewer)
+
+    if render_output_state["viewer"] is None:
+        active = tree.nodes.active
+        render_output_state["viewer"] = {"scene" : scene.name, "added" : viewer is None, "linked" : False, "active" : active.name if active else None}
+
+    if viewer is None:
+        viewer = tree.nodes.new("CompositorNodeViewer")
+        viewer.name = render_output_viewer
+        viewer.label = "TMG Output"
+
+    ## "Viewer Node" only holds the active viewer's output
+    if tree.nodes.active != viewer:
+        tree.nodes.active = viewer
+
+    if not viewer.inputs[0].is_linked:
+        composite = next((node for node in tree.nodes if node.type == 'COMPOSITE'), None)
+        source = None
+
+        if composite and composite.inputs[0].is_linked:
+            source = composite.inputs[0].links[0].from_socket
+        else:
+            layers = next((node for node in tree.nodes if node.type == 'R_LAYERS'), None)
+            source = layers.outputs[0] if layers else None
+
+        if source is None:
+            return None
+
+        tree.links.new(source, viewer.inputs[0])
+        render_output_state["viewer"]["linked"] = True
+
+    return viewer
+
+
+def _render_output_restore_viewer():
+    viewer_state = render_output_state["viewer"]
+    render_output_state["viewer"] = None
+
+    if viewer_state is None:
+        return
+
+    scene = bpy.data.scenes.get(viewer_state["scene"])
+    tree = scene.node_tree if scene else None
+    viewer = tree.nodes.get(render_output_viewer) if tree else None
+
+    if viewer is None:
+        return
+
+    if viewer_state["added"]:
+        tree.nodes.remove(viewer)
+    elif viewer_state["linked"]:
+        for link in list(viewer.inputs[0].links):
+            tree.links.remove(link)
+
+    active = tree.nodes.get(viewer_state["active"] or "")
+    if active is not None:
+        tree.nodes.active = active
+
+
+def _render_output_pixels():
+    image = bpy.data.images.get("Viewer Node")
+
+    if image is None:
+        return None
+
+    width, height = image.size
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+
+    ## Blender stores rows bottom up
+    return pixels.reshape(height, width, 4)[::-1]
+
+
+def _render_output_spec(scene):
+    settings = scene.render.image_settings
+    channels = 4 if settings.color_mode == 'RGBA' else 3
+
+    if settings.file_format == 'OPEN_EXR':
+        return {
+            "channels" : channels,
+            "format" : "float" if settings.color_depth == '32' else "half",
+            "compression" : render_output_codecs.get(settings.exr_codec, "zip"),
+            "srgb" : False,
+        }
+
+    return {
+        "channels" : channels,
+        "format" : "uint16" if settings.color_depth == '16' else "uint8",
+        "compression" : "zip:%s" %max(1, settings.compression // 10),
+        "srgb" : True,
+    }
+
+
+def _render_output_encode(filepath, pixels, spec):
+    ## Runs on the pool, no bpy access in here
+    pixels = pixels[:, :, :spec["channels"]]
+
+    if spec["srgb"]:
+        rgb = np.clip(pixels[:, :, :3], 0.0, 1.0)
+        rgb = np.where(rgb <= 0.0031308, rgb * 12.92, 1.055 * np.power(rgb, 1 / 2.4) - 0.055)
+        pixels = np.concatenate((rgb, pixels[:, :, 3:]), axis=2) if spec["channels"] == 4 else rgb
+
+    os.makedirs(os.path.dirname(filepath), exist_ok=True)
+
+    ## Write next to the target and rename so a half written file is never
+    ## mistaken for a finished one
+    temp = filepath + ".part"
+    output = oiio.ImageOutput.create(filepath)
+    image_spec = oiio.ImageSpec(pixels.shape[1], pixels.shape[0], spec["channels"], spec["format"])
+    image_spec.attribute("compression", spec["compression"])
+
+    if output is None or not output.open(temp, image_spec):
+        raise OSError(oiio.geterror())
+
+    ok = output.write_image(np.ascontiguousarray(pixels, dtype=np.float32))
+    output.close()
+
+    if not ok:
+        raise OSError(output.geterror())
+
+    os.replace(temp, filepath)
+    return filepath
+
+
+def _render_output_collect(jobs, wait=False):
+    ## Journal / cache bookkeeping for finished writes, on the main thread
+    pending = render_output_state["pending"]
+
+    while pending and (wait or pending[0]["future"].done()):
+        entry = pending.pop(0)
+        render_output_state["bytes"] -= entry["bytes"]
+
+        try:
+            entry["future"].result()
+            error = None
+        except Exception as exception:
+            error = str(exception)
+
+        job = jobs[entry["index"]] if entry["index"] < len(jobs) else None
+
+        if job is None or job.camera is None:
+            continue
+
+        if error is None:
+            _render_journal_write(job, event="frame", frame=entry["frame"], filepath=entry["filepath"])
+            _render_cache_finished(entry["index"], entry["frame"], entry["filepath"])
+            _transcode_submit(jobs.id_data, entry["filepath"])
+        else:
+            job.status = 'FAILED'
+            _render_journal_write(job, event="failed", frame=entry["frame"], filepath=entry["filepath"], error=error)
+
+
+def _render_output_submit(scene, jobs, index, frame, filepath, pixels):
+    tmg_cam_vars = scene.tmg_cam_vars
+    workers = tmg_cam_vars.output_threads
+    limit = tmg_cam_vars.output_memory * 1024 * 1024
+
+    if render_output_state["pool"] is None or render_output_state["workers"] != workers:
+        if render_output_state["pool"]:
+            _render_output_collect(jobs, wait=True)
+            render_output_state["pool"].shutdown()
+        render_output_state["pool"] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="tmg_cam_output")
+        render_output_state["workers"] = workers
+
+    ## Back pressure, wait for the oldest writes until this frame fits
+    while render_output_state["pending"] and render_output_state["bytes"] + pixels.nbytes > limit:
+        wait_futures([render_output_state["pending"][0]["future"]])
+        _render_output_collect(jobs)
+
+    render_output_state["scene"] = scene.name
+    future = render_output_state["pool"].submit(_render_output_encode, filepath, pixels, _render_output_spec(scene))
+    render_output_state["pending"].append({"future" : future, "index" : index, "frame" : frame, "filepath" : filepath, "bytes" : pixels.nbytes})
+    render_output_state["bytes"] += pixels.nbytes
+
+
+def _render_output_shutdown(restore_viewer=True):
+    ## Drains every queued write and stops the pool, it is started again by
+    ## the next submit
+    scene = bpy.data.scenes.get(render_output_state["scene"] or "")
+
+    if scene is not None:
+        _render_output_collect(scene.tmg_cam_vars.render_jobs, wait=True)
+    else:
+        wait_futures([entry["future"] for entry in render_output_state["pending"]])
+        render_output_state["pending"] = []
+        render_output_state["bytes"] = 0
+
+    if render_output_state["pool"]:
+        render_output_state["pool"].shutdown()
+        render_output_state["pool"] = None
+        render_output_state["workers"] = 0
+
+    render_output_state["scene"] = None
+
+    if restore_viewer:
+        _render_output_restore_viewer()
+
+
+@persistent
+def tmg_cam_render_output_cancel(scene, depsgraph=None):
+    _render_output_shutdown(restore_viewer=False)
+
+
+def _render_queue_unit(scene, index, job, frame):
+    rd = scene.render
+    res_x, res_y = _render_job_resolution(scene, job)
+
+    ## Only camera level properties change between jobs, everything else is
+    ## left alone so persistent data can be reused
+    if scene.camera != job.camera:
+        scene.camera = job.camera
+    _set_if_changed(rd, "resolution_x", int(res_x))
+    _set_if_changed(rd, "resolution_y", int(res_y))
+
+    if scene.frame_current != frame:
+        scene.frame_set(frame)
+
+    rd.filepath = _render_job_paths(scene, job, [frame])[0]
+    _sync_composite_outputs(scene, job.camera)
+    filepath = bpy.path.abspath(rd.filepath)
+
+    job.status = 'RENDERING'
+
+    use_async = scene.tmg_cam_vars.use_async_output and _render_output_supported(scene) and _render_output_ensure_viewer(scene) is not None
+
+    try:
+        result = bpy.ops.render.render(write_still=not use_async, scene=scene.name)
+    except RuntimeError:
+        result = {'CANCELLED'}
+
+    if use_async and 'FINISHED' in result:
+        pixels = _render_output_pixels()
+
+        if pixels is not None:
+            ## Journal and cache entries are written once the file is on disk
+            _render_output_submit(scene, scene.tmg_cam_vars.render_jobs, index, frame, filepath, pixels)
+            return True
+
+        result = {'CANCELLED'}
+
+    if 'FINISHED' not in result or not _render_output_exists(filepath):
+        job.status = 'FAILED'
+        _render_journal_write(job, event="failed", frame=frame, filepath=filepath)
+        return False
+
+    _render_journal_write(job, event="frame", frame=frame, filepath=filepath)
+    _render_cache_finished(index, frame, filepath)
+    _transcode_submit(scene, filepath)
+    return True
+
+
+def _finish_render_queue_job(jobs, units, index):
+    job = jobs[index]
+
+    if job.status == 'RENDERING' and not any(unit[0] == index for unit in units):
+        job.status = 'DONE'
+
+
+def _run_render_queue(scene, resume=False):
+    ## Blocking version for background sessions (blender -b --python)
+    jobs = scene.tmg_cam_vars.render_jobs
+    units = _queue_render_units(scene, jobs, resume)
+    state = _store_render_state(scene)
+    _begin_render_batch(scene)
+    render_queue_state["running"] = True
+
+    try:
+        while units:
+            index, frame = units.pop(0)
+            _render_queue_unit(scene, index, jobs[index], frame)
+            _render_output_collect(jobs)
+            _finish_render_queue_job(jobs, units, index)
+    finally:
+        render_queue_state["running"] = False
+        _render_output_shutdown()
+        _transcode_wait()
+        _restore_render_state(scene, state)
+        _end_render_batch()
+
+
+@persistent
+def tmg_cam_shutdown(dummy=None):
+    ## Runs before a file is loaded and on unregister, nothing started for
+    ## one file may keep running against the next
+    _render_output_shutdown()
+    _transcode_stop()
+
+    if render_farm_state["running"]:
+        _render_farm_stop()
+
+
+## Render border around the selection, the previous border comes back once
+## the render finishes or is cancelled
+render_border_state = {
+    "restore" : None,
+}
+
+
+def _selected_render_border(scene, camera, objects, padding):
+    xs = []
+    ys = []
+    perspective = camera.data.type != 'ORTHO'
+
+    for ob in objects:
+        for corner in ob.bound_box:
+            co = world_to_camera_view(scene, camera, ob.matrix_world @ Vector(corner))
+
+            ## Behind a perspective camera the projection flips, use the
+            ## whole frame rather than a wrong border
+            if perspective and co.z <= 0.0:
+                return 0.0, 0.0, 1.0, 1.0
+
+            xs.append(co.x)
+            ys.append(co.y)
+
+    if not xs:
+        return None
+
+    min_x, max_x = min(xs) - padding, max(xs) + padding
+    min_y, max_y = min(ys) - padding, max(ys) + padding
+
+    min_x, min_y = max(0.0, min_x), max(0.0, min_y)
+    max_x, max_y = min(1.0, max_x), min(1.0, max_y)
+
+    if min_x >= max_x or min_y >= max_y:
+        return None
+
+    return min_x, min_y, max_x, max_y
+
+
+def _set_render_border(scene, camera, border):
+    rd = scene.render
+    render_border_state["restore"] = (scene.name, scene.camera.name if scene.camera else "",
+                                      rd.use_border, rd.border_min_x, rd.border_min_y, rd.border_max_x, rd.border_max_y)
+
+    scene.camera = camera
+    rd.use_border = True
+    rd.border_min_x, rd.border_min_y, rd.border_max_x, rd.border_max_y = border
+
+
+def _restore_render_border(*args):
+    restore = render_border_state["restore"]
+    render_border_state["restore"] = None
+
+    for handlers in (bpy.app.handlers.render_complete, bpy.app.handlers.render_cancel):
+        if _restore_render_border in handlers:
+            handlers.remove(_restore_render_border)
+
+    if restore is None:
+        return
+
+    scene = bpy.data.scenes.get(restore[0])
+
+    if scene:
+        rd = scene.render
+        scene.camera = bpy.data.objects.get(restore[1])
+        rd.use_border, rd.border_min_x, rd.border_min_y, rd.border_max_x, rd.border_max_y = restore[2:]
+
+
+## Preview ladder, each step renders bigger into the next render slot
+render_preview_steps = (25, 50, 100)
+
+render_preview_state = {
+    "running" : False,
+    "rendering" : False,
+    "cancel" : False,
+    "step" : 0,
+    "restore" : None,
+}
+
+
+def _render_preview_slot(start, step):
+    ## Render slots are 1 - 8
+    return (start - 1 + step) % 8 + 1
+
+
+def _render_preview_complete(*args):
+    render_preview_state["rendering"] = False
+
+
+def _render_preview_cancel(*args):
+    render_preview_state["rendering"] = False
+    render_preview_state["cancel"] = True
+
+
+def _render_preview_begin(scene):
+    tmg_cam_vars = scene.tmg_cam_vars
+    render_preview_state["restore"] = (scene.render.resolution_percentage, tmg_cam_vars.render_slot)
+    render_preview_state["step"] = 0
+    render_preview_state["cancel"] = False
+    render_preview_state["rendering"] = False
+
+    scene.camera = tmg_cam_vars.scene_camera
+
+
+def _render_preview_end(scene):
+    restore = render_preview_state["restore"]
+    render_preview_state["restore"] = None
+    render_preview_state["running"] = False
+    render_preview_state["rendering"] = False
+
+    for handlers, handler in ((bpy.app.handlers.render_complete, _render_preview_complete), (bpy.app.handlers.render_cancel, _render_preview_cancel)):
+        if handler in handlers:
+            handlers.remove(handler)
+
+    if restore:
+        _set_if_changed(scene.render, "resolution_percentage", restore[0])
+
+
+def _render_preview_prepare(scene, step):
+    start_slot = render_preview_state["restore"][1]
+    scene.render.resolution_percentage = render_preview_steps[step]
+    scene.tmg_cam_vars.render_slot = _render_preview_slot(start_slot, step)
+
+
+def _run_render_preview(scene):
+    ## Blocking version for background sessions
+    _render_preview_begin(scene)
+
+    try:
+        for step in range(len(render_preview_steps)):
+            _render_preview_prepare(scene, step)
+            bpy.ops.render.render(scene=scene.name)
+    finally:
+        _render_preview_end(scene)
+
+
+## Multi camera render, every camera becomes a multiview view so the scene
+## is synced once. A view finds its camera by the active camera's name with
+## its suffix swapped, so using the full camera names as suffixes leaves an
+## empty base name and each view picks up its own camera
+def _store_multiview_state(scene):
+    rd = scene.render
+    return {
+        "camera" : scene.camera,
+        "filepath" : rd.filepath,
+        "use_multiview" : rd.use_multiview,
+        "views_format" : rd.views_format,
+        "image_views_format" : rd.image_settings.views_format,
+        "views" : [(view.name, view.use) for view in rd.views],
+        "outputs" : _store_composite_outputs(scene),
+    }
+
+
+def _restore_multiview_state(scene, state, added):
+    rd = scene.render
+
+    for view in added:
+        rd.views.remove(rd.views[view])
+
+    for name, use in state["views"]:
+        if name in rd.views:
+            rd.views[name].use = use
+
+    rd.image_settings.views_format = state["image_views_format"]
+    rd.views_format = state["views_format"]
+    rd.use_multiview = state["use_multiview"]
+    rd.filepath = state["filepath"]
+    scene.camera = state["camera"]
+    _apply_composite_outputs(scene, state["outputs"])
+
+
+def _render_multiview(scene, cameras):
+    rd = scene.render
+    state = _store_multiview_state(scene)
+    added = []
+    written = []
+    skipped = []
+    folder = None
+
+    try:
+        rd.use_multiview = True
+        rd.views_format = 'MULTIVIEW'
+        rd.image_settings.views_format = 'INDIVIDUAL'
+
+        for view in rd.views:
+            view.use = False
+
+        for i, camera in enumerate(cameras):
+            view = rd.views.new("TMG_Cam_%s" %i)
+            view.use = True
+            view.camera_suffix = camera.name
+            view.file_suffix = "_tmg_view_%s" %i
+            added.append(view.name)
+
+        scene.camera = cameras[0]
+
+        ## File Output nodes have one path for every view, so they would
+        ## write all cameras over each other
+        _mute_composite_outputs(scene)
+
+        folder = tempfile.mkdtemp(prefix="tmg_cam_multiview_")
+        rd.filepath = os.path.join(folder, "view")
+        base, ext = os.path.splitext(rd.frame_path(frame=scene.frame_current))
+        rd.filepath = base + ext
+
+        try:
+            result = bpy.ops.render.render(write_still=True, scene=scene.name)
+        except RuntimeError:
+            result = {'CANCELLED'}
+
+        ## Cancelled part way, whatever views were written are incomplete
+        if 'FINISHED' not in result:
+            return written, [camera.name for camera in cameras]
+
+        ## Move each view's file to its camera's output path
+        for i, camera in enumerate(cameras):
+            source = "%s_tmg_view_%s%s" %(base, i, ext)
+
+            if not _render_output_exists(source):
+                skipped.append(camera.name)
+                continue
+
+            values = _path_template_values(scene, camera)
+            target = bpy.path.abspath(_expand_render_paths(scene, _camera_path_template(camera), values, [scene.frame_current])[0])
+
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            shutil.move(source, target)
+            written.append(target)
+    finally:
+        ## Full resolution views are left behind when the render fails
+        if folder:
+            shutil.rmtree(folder, ignore_errors=True)
+        _restore_multiview_state(scene, state, added)
+
+    return written, skipped
+
+
+## Local render farm, background blender workers fed (camera, frame chunk) tasks
+render_farm_state = {
+    "running" : False,
+    "scene" : "",
+    "blend" : "",
+    "workers" : [],
+    "tasks" : [],
+    "events" : queue.Queue(),
+    "job_tasks" : {},
+    "job_seconds" : {},
+    "job_frames" : {},
+    "frames_done" : 0,
+    "frames_total" : 0,
+    "failed" : [],
+    "started" : 0.0,
+    "finished" : 0.0,
+}
+
+
+def _render_farm_tasks(scene, jobs, chunk, threads, resume=False):
+    tasks = []
+    use_cache = scene.tmg_cam_vars.use_render_cache
+    _render_cache_reset()
+
+    for index, job in enumerate(jobs):
+        if not (job.use and job.camera and job.camera.type == "CAMERA"):
+            job.status = 'SKIPPED'
+            continue
+
+        frames = _render_job_pending_frames(scene, job, resume)
+
+        if use_cache and frames:
+            frames = _render_cache_filter(scene, index, job, frames)
+
+        if not frames:
+            job.status = 'DONE'
+            continue
+
+        job.status = 'QUEUED'
+        _render_journal_write(job, event="start", frames=frames)
+        res_x, res_y = _render_job_resolution(scene, job)
+
+        filepaths = [bpy.path.abspath(filepath) for filepath in _render_job_paths(scene, job, frames)]
+
+        ## The workers render a copy saved elsewhere, so "//" must not reach them
+        outputs = [(name, mute, base_path and bpy.path.abspath(base_path), slot_paths) for name, mute, base_path, slot_paths in _composite_output_settings(scene, job.camera)]
+
+        for i in range(0, len(frames), chunk):
+            tasks.append({
+                "job" : index,
+                "scene" : scene.name,
+                "camera" : job.camera.name,
+                "frames" : frames[i:i + chunk],
+                "filepaths" : filepaths[i:i + chunk],
+                "resolution" : [int(res_x), int(res_y)],
+                "threads" : threads,
+                "outputs" : outputs,
+            })
+
+    return tasks
+
+
+def _render_farm_read(index, process, events):
+    for line in process.stdout:
+        events.put((index, line.rstrip()))
+    events.put((index, None))
+
+
+def _render_farm_start_worker(index, blend):
+    worker_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "TMG_Camera_Farm_Worker.py")
+    process = subprocess.Popen(
+        [bpy.app.binary_path, "-b", blend, "--factory-startup", "--python", worker_script],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+
+    reader = threading.Thread(target=_render_farm_read, args=(index, process, render_farm_state["events"]), daemon=True)
+    reader.start()
+
+    return {"process" : process, "task" : None, "left" : [], "alive" : True, "frames" : 0, "seconds" : 0.0}
+
+
+def _render_farm_send(worker, line):
+    try:
+        worker["process"].stdin.write(line + "\n")
+        worker["process"].stdin.flush()
+    except (BrokenPipeError, OSError):
+        worker["alive"] = False
+
+
+def _render_farm_dispatch(worker, jobs):
+    tasks = render_farm_state["tasks"]
+
+    if tasks:
+        task = tasks.pop(0)
+        worker["task"] = task
+        worker["left"] = list(task["frames"])
+        if task["job"] < len(jobs):
+            jobs[task["job"]].status = 'RENDERING'
+        _render_farm_send(worker, json.dumps(task))
+    else:
+        worker["task"] = None
+        _render_farm_send(worker, "quit")
+
+
+def _render_farm_task_finished(jobs, job):
+    job_tasks = render_farm_state["job_tasks"]
+    job_tasks[job] = job_tasks.get(job, 1) - 1
+
+    if job_tasks[job] <= 0 and job < len(jobs) and jobs[job].status == 'RENDERING':
+        jobs[job].status = 'DONE'
+
+
+def _render_farm_event(worker, data, jobs):
+    event = data["event"]
+
+    if event in {"frame", "failed"} and data["frame"] in worker["left"]:
+        worker["left"].remove(data["frame"])
+
+    if event == "frame":
+        job = data["job"]
+        render_farm_state["frames_done"] += 1
+        render_farm_state["job_frames"][job] = render_farm_state["job_frames"].get(job, 0) + 1
+        render_farm_state["job_seconds"][job] = render_farm_state["job_seconds"].get(job, 0.0) + data["seconds"]
+        worker["frames"] += 1
+        worker["seconds"] += data["seconds"]
+
+        if job < len(jobs) and jobs[job].camera:
+            _render_journal_write(jobs[job], event="frame", frame=data["frame"], filepath=data["filepath"], seconds=data["seconds"])
+
+        _render_cache_finished(job, data["frame"], data["filepath"])
+        _transcode_submit(jobs.id_data, data["filepath"])
+
+    elif event == "failed":
+        render_farm_state["failed"].append((data["job"], data["frame"], data["error"]))
+        render_farm_state["frames_done"] += 1
+        if data["job"] < len(jobs):
+            jobs[data["job"]].status = 'FAILED'
+            if jobs[data["job"]].camera:
+                _render_journal_write(jobs[data["job"]], event="failed", frame=data["frame"], error=data["error"])
+
+    elif event == "done":
+        _render_farm_task_finished(jobs, data["job"])
+        _render_farm_dispatch(worker, jobs)
+
+    elif event == "ready":
+        _render_farm_dispatch(worker, jobs)
+
+
+def _render_farm_worker_lost(worker, index, jobs):
+    ## Frames the worker never reported go back to the front of the queue
+    ## while a busy worker is left to pick them up, otherwise they fail
+    state = render_farm_state
+    task = worker["task"]
+    lost = worker["left"]
+    worker["task"] = None
+
+    if not lost:
+        _render_farm_task_finished(jobs, task["job"])
+        return
+
+    if any(other["alive"] and other["task"] for other in state["workers"]):
+        filepaths = dict(zip(task["frames"], task["filepaths"]))
+        state["tasks"].insert(0, dict(task, frames=lost, filepaths=[filepaths[frame] for frame in lost]))
+        return
+
+    _render_farm_fail_frames(jobs, task, lost, "Worker %s exited" %(index + 1))
+
+
+def _render_farm_fail_frames(jobs, task, frames, error):
+    ## Failed frames still count towards the progress total
+    state = render_farm_state
+    state["frames_done"] += len(frames)
+
+    for frame in frames:
+        state["failed"].append((task["job"], frame, error))
+
+    if task["job"] < len(jobs):
+        job = jobs[task["job"]]
+        job.status = 'FAILED'
+        if job.camera:
+            for frame in frames:
+                _render_journal_write(job, event="failed", frame=frame, error=error)
+
+    _render_farm_task_finished(jobs, task["job"])
+
+
+def _render_farm_poll():
+    state = render_farm_state
+    scene = bpy.data.scenes.get(state["scene"])
+
+    if not state["running"] or scene is None:
+        _render_farm_stop()
+        return None
+
+    jobs = scene.tmg_cam_vars.render_jobs
+
+    while True:
+        try:
+            index, line = state["events"].get_nowait()
+        except queue.Empty:
+            break
+
+        worker = state["workers"][index]
+
+        if line is None:
+            worker["alive"] = False
+            if worker["task"]:
+                _render_farm_worker_lost(worker, index, jobs)
+            continue
+
+        if line.startswith("TMG_FARM "):
+            _render_farm_event(worker, json.loads(line[9:]), jobs)
+
+    if not any(worker["alive"] for worker in state["workers"]):
+        ## Tasks nobody is left to render, requeued or never started
+        for task in state["tasks"]:
+            _render_farm_fail_frames(jobs, task, task["frames"], "No workers left")
+        state["tasks"] = []
+
+    tag_redraw(bpy.context, space_type="VIEW_3D", region_type="UI")
+
+    if not any(worker["alive"] for worker in state["workers"]):
+        _render_farm_stop()
+        return None
+
+    return 0.5
+
+
+def _render_farm_start(scene, workers, threads, chunk, resume=False):
+    state = render_farm_state
+    tasks = _render_farm_tasks(scene, scene.tmg_cam_vars.render_jobs, chunk, threads, resume)
+
+    if not tasks:
+        return 0
+
+    ## Workers load a copy so unsaved changes are rendered too
+    blend = os.path.join(tempfile.mkdtemp(prefix="tmg_cam_farm_"), "farm.blend")
+    bpy.ops.wm.save_as_mainfile(filepath=blend, copy=True, relative_remap=True)
+
+    state["running"] = True
+    state["scene"] = scene.name
+    state["blend"] = blend
+    state["tasks"] = tasks
+    state["events"] = queue.Queue()
+    state["job_tasks"] = {}
+    state["job_seconds"] = {}
+    state["job_frames"] = {}
+    state["frames_done"] = 0
+    state["frames_total"] = sum(len(task["frames"]) for task in tasks)
+    state["failed"] = []
+    state["started"] = time.time()
+
+    for task in tasks:
+        state["job_tasks"][task["job"]] = state["job_tasks"].get(task["job"], 0) + 1
+
+    state["workers"] = [_render_farm_start_worker(i, blend) for i in range(min(workers, len(tasks)))]
+
+    bpy.app.timers.register(_render_farm_poll, first_interval=0.5)
+    return len(tasks)
+
+
+def _render_farm_stop():
+    state = render_farm_state
+
+    for worker in state["workers"]:
+        if worker["process"].poll() is None:
+            worker["process"].terminate()
+        worker["alive"] = False
+
+    if bpy.app.timers.is_registered(_render_farm_poll):
+        bpy.app.timers.unregister(_render_farm_poll)
+
+    ## Frames in flight were lost with their worker, they can be resumed
+    scene = bpy.data.scenes.get(state["scene"])
+    if scene is not None:
+        for job in scene.tmg_cam_vars.render_jobs:
+            if job.status == 'RENDERING':
+                job.status = 'QUEUED'
+
+    if state["blend"] and os.path.exists(state["blend"]):
+        os.remove(state["blend"])
+        try:
+            os.rmdir(os.path.dirname(state["blend"]))
+        except OSError:
+            pass
+
+    state["blend"] = ""
+    state["running"] = False
+    state["finished"] = time.time()
+
+
+## Delivery transcoding, finished EXR masters are converted to review formats
+## by background Blender processes so one render feeds every format
+transcode_state = {
+    "workers" : [],
+    "tasks" : [],
+    "events" : queue.Queue(),
+    "done" : 0,
+    "failed" : [],
+    "timer" : False,
+    "limit" : 1,
+    "idle_since" : None,
+}
+
+## Seconds the workers are kept around with nothing to do, so a queue that
+## renders frame after frame doesn't start Blender again for each one
+transcode_idle_timeout = 30.0
+
+
+def _delivery_variants(scene, filepath):
+    folder, name = os.path.split(filepath)
+    name = os.path.splitext(name)[0]
+    variants = []
+
+    for delivery in scene.tmg_cam_vars.deliveries:
+        if not delivery.use:
+            continue
+
+        ext = render_delivery_extensions[delivery.file_format]
+        variants.append({
+            "filepath" : os.path.join(folder, bpy.path.clean_name(delivery.name), name + ext),
+            "file_format" : delivery.file_format,
+            "color_depth" : delivery.color_depth,
+            "view_transform" : delivery.view_transform,
+            "look" : delivery.look,
+            "scale" : delivery.scale,
+            "quality" : delivery.quality,
+        })
+
+    return variants
+
+
+def _transcode_read(index, process, events):
+    for line in process.stdout:
+        events.put((index, line.rstrip()))
+    events.put((index, None))
+
+
+def _transcode_start_worker(index):
+    worker_script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "TMG_Camera_Transcode_Worker.py")
+    process = subprocess.Popen(
+        [bpy.app.binary_path, "-b", "--factory-startup", "--python", worker_script],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, bufsize=1)
+
+    reader = threading.Thread(target=_transcode_read, args=(index, process, transcode_state["events"]), daemon=True)
+    reader.start()
+
+    return {"process" : process, "task" : None, "alive" : True, "ready" : False}
+
+
+def _transcode_dispatch(worker):
+    if transcode_state["tasks"]:
+        worker["task"] = transcode_state["tasks"].pop(0)
+        transcode_state["idle_since"] = None
+        _render_farm_send(worker, json.dumps(worker["task"]))
+    else:
+        worker["task"] = None
+
+
+def _transcode_spawn():
+    ## Start workers on demand, workers still starting up count as idle
+    state = transcode_state
+    alive = [worker for worker in state["workers"] if worker["alive"]]
+    idle = sum(1 for worker in alive if worker["task"] is None)
+
+    if len(alive) < state["limit"] and len(state["tasks"]) > idle:
+        state["workers"].append(_transcode_start_worker(len(state["workers"])))
+
+
+def _transcode_submit(scene, filepath):
+    tmg_cam_vars = scene.tmg_cam_vars
+
+    if not tmg_cam_vars.use_delivery or os.path.splitext(filepath)[1].lower() != ".exr":
+        return
+
+    variants = _delivery_variants(scene, bpy.path.abspath(filepath))
+
+    if not variants:
+        return
+
+    state = transcode_state
+    state["tasks"].append({"source" : bpy.path.abspath(filepath), "variants" : variants})
+    state["limit"] = tmg_cam_vars.delivery_workers
+    _transcode_spawn()
+
+    ## Idle ones pick the task up straight away
+    for worker in state["workers"]:
+        if worker["alive"] and worker["ready"] and worker["task"] is None:
+            _transcode_dispatch(worker)
+
+    if not state["timer"]:
+        state["timer"] = True
+        bpy.app.timers.register(_transcode_poll, first_interval=0.5)
+
+
+def _transcode_poll():
+    state = transcode_state
+
+    while True:
+        try:
+            index, line = state["events"].get_nowait()
+        except queue.Empty:
+            break
+
+        if index >= len(state["workers"]):
+            continue
+
+        worker = state["workers"][index]
+
+        if line is None:
+            worker["alive"] = False
+            if worker["task"]:
+                state["failed"].append((worker["task"]["source"], "Worker exited"))
+                worker["task"] = None
+
+            ## A worker that never got ready won't do better when restarted
+            if not worker["ready"]:
+                state["failed"].extend((task["source"], "Worker failed to start") for task in state["tasks"])
+                state["tasks"] = []
+            continue
+
+        if not line.startswith("TMG_TRANSCODE "):
+            continue
+
+        data = json.loads(line[14:])
+
+        if data["event"] == "ready":
+            worker["ready"] = True
+            _transcode_dispatch(worker)
+        elif data["event"] == "failed":
+            state["failed"].append((data.get("filepath", data["source"]), data["error"]))
+        elif data["event"] == "done":
+            if data["written"]:
+                state["done"] += 1
+            _transcode_dispatch(worker)
+
+    ## Tasks can be left over when workers exited, start new ones for them
+    if state["tasks"]:
+        _transcode_spawn()
+
+    alive = any(worker["alive"] for worker in state["workers"])
+
+    if not state["tasks"] and not any(worker["task"] for worker in state["workers"]):
+        ## Nothing queued and nobody busy, let the workers go after a while
+        if state["idle_since"] is None:
+            state["idle_since"] = time.time()
+
+        if not alive or time.time() - state["idle_since"] > transcode_idle_timeout:
+            _transcode_stop()
+            return None
+
+    return 0.5
+
+
+def _transcode_wait():
+    ## Timers never fire in a blocking (blender -b) run and the workers die
+    ## with Blender, so deliveries are polled here until they're all written
+    state = transcode_state
+
+    while state["tasks"] or any(worker["task"] for worker in state["workers"]):
+        if _transcode_poll() is None:
+            break
+        time.sleep(0.1)
+
+    _transcode_stop()
+
+
+def _transcode_stop():
+    state = transcode_state
+
+    for worker in state["workers"]:
+        if worker["alive"]:
+            _render_farm_send(worker, "quit")
+        worker["alive"] = False
+
+    state["workers"] = []
+    state["events"] = queue.Queue()
+    state["idle_since"] = None
+
+    if state["timer"] and bpy.app.timers.is_registered(_transcode_poll):
+        bpy.app.timers.unregister(_transcode_poll)
+    state["timer"] = False
+
+
+def _render_samples(scene):
+    if scene.render.engine == "CYCLES":
+        return scene.cycles.samples
+    if scene.render.engine in {"BLENDER_EEVEE", "BLENDER_EEVEE_NEXT"}:
+        return scene.eevee.taa_render_samples
+    return 1
+
+
+def _set_render_samples(scene, samples):
+    if scene.render.engine == "CYCLES":
+        scene.cycles.samples = samples
+    elif scene.render.engine in {"BLENDER_EEVEE", "BLENDER_EEVEE_NEXT"}:
+        scene.eevee.taa_render_samples = samples
+
+
+def _render_pixels(res_x, res_y, percentage):
+    return max(1, int(res_x * percentage / 100) * int(res_y * percentage / 100))
+
+
+def _probe_render(scene, percentage, samples):
+    rd = scene.render
+    rd.resolution_percentage = percentage
+    _set_render_samples(scene, samples)
+
+    start = time.time()
+    bpy.ops.render.render(scene=scene.name)
+    return time.time() - start
+
+
+def _run_render_probe(scene, camera, percentage, samples):
+    rd = scene.render
+    cscene = scene.cycles if rd.engine == "CYCLES" else None
+    restore = (scene.camera, rd.resolution_percentage, _render_samples(scene))
+    pixels = _render_pixels(rd.resolution_x, rd.resolution_y, percentage)
+
+    scene.camera = camera
+    render_stats_state["suppress"] += 1
+
+    ## Adaptive sampling stops pixels early and denoising adds its own cost,
+    ## either would break the time per sample. The estimate is marked as
+    ## approximate when the real render uses them
+    if cscene:
+        cycles_restore = (cscene.use_adaptive_sampling, cscene.use_denoising)
+        cscene.use_adaptive_sampling = False
+        cscene.use_denoising = False
+
+    ## File Output nodes point at the camera's delivered frames
+    outputs = _mute_composite_outputs(scene)
+
+    try:
+        ## Two sample counts at the same size, the difference is the cost of
+        ## sampling and what's left over is sync / setup time
+        low = _probe_render(scene, percentage, samples)
+        high = _probe_render(scene, percentage, samples * 2)
+    finally:
+        render_stats_state["suppress"] -= 1
+        _apply_composite_outputs(scene, outputs)
+        scene.camera = restore[0]
+        rd.resolution_percentage = restore[1]
+        _set_render_samples(scene, restore[2])
+        if cscene:
+            cscene.use_adaptive_sampling, cscene.use_denoising = cycles_restore
+
+    sample_cost = (high - low) / (pixels * samples)
+    overhead = low - sample_cost * pixels * samples
+
+    if sample_cost <= 0:
+        sample_cost = high / (pixels * samples * 2)
+        overhead = 0.0
+
+    settings = camera.tmg_cam_settings
+    settings.probe_engine = rd.engine
+    settings.probe_sample_cost = sample_cost
+    settings.probe_overhead = max(0.0, overhead)
+
+    return sample_cost, overhead
+
+
+def _estimate_render_seconds(scene, camera, res_x=None, res_y=None, samples=None):
+    ## Per frame estimate from the camera's last probe, None if it has none
+    settings = camera.tmg_cam_settings
+    rd = scene.render
+
+    if settings.probe_sample_cost <= 0 or settings.probe_engine != rd.engine:
+        return None
+
+    res_x = rd.resolution_x if res_x is None else res_x
+    res_y = rd.resolution_y if res_y is None else res_y
+    samples = _render_samples(scene) if samples is None else samples
+
+    pixels = _render_pixels(res_x, res_y, rd.resolution_percentage)
+    return settings.probe_overhead + settings.probe_sample_cost * pixels * samples
+
+
+def _estimate_is_approximate(scene):
+    return scene.render.engine == "CYCLES" and (scene.cycles.use_adaptive_sampling or scene.cycles.use_denoising)
+
+
+def _render_job_eta_key(scene, job):
+    ## Everything the estimate is computed from, a different key means the
+    ## stored estimate is stale
+    if job.camera is None or job.camera.type != "CAMERA":
+        return ""
+
+    rd = scene.render
+    settings = job.camera.tmg_cam_settings
+    res_x, res_y = _render_job_resolution(scene, job)
+
+    return "%s|%s|%s|%sx%s|%s|%r|%r|%s" %(rd.engine, _render_samples(scene), rd.resolution_percentage, int(res_x), int(res_y),
+                                       settings.probe_engine, settings.probe_sample_cost, settings.probe_overhead, len(_render_job_frames(scene, job)))
+
+
+def _update_render_job_eta(scene, job):
+    ## Stored on the job so the queue panel only has to add them up
+    job.eta_key = _render_job_eta_key(scene, job)
+
+    if not job.eta_key:
+        job.eta_frame = -1.0
+        job.eta_frames = 0
+        return
+
+    res_x, res_y = _render_job_resolution(scene, job)
+    estimate = _estimate_render_seconds(scene, job.camera, res_x, res_y)
+
+    job.eta_frame = -1.0 if estimate is None else estimate
+    job.eta_frames = len(_render_job_frames(scene, job))
+
+
+def _refresh_render_job_etas(scene):
+    ## Samples, engine, resolution and camera sizes change outside the job's
+    ## own properties. A running queue sets job resolutions on the scene, so
+    ## it's left alone until it's done
+    if render_queue_state["running"] or render_stats_state["suppress"]:
+        return
+
+    for job in scene.tmg_cam_vars.render_jobs:
+        if job.eta_key != _render_job_eta_key(scene, job):
+            _update_render_job_eta(scene, job)
+
+
+def _render_queue_eta(jobs, remaining=None):
+    ## remaining maps a job index to its frames left while the queue runs
+    seconds = 0.0
+    missing = 0
+    frames = 0
+
+    for index, job in enumerate(jobs):
+        if remaining is None:
+            count = job.eta_frames if job.use and job.camera else 0
+        else:
+            count = remaining.get(index, 0)
+
+        if job.eta_frame < 0:
+            missing += count
+        else:
+            seconds += job.eta_frame * count
+
+        frames += count
+
+    return seconds, missing, frames
+
+
+def _format_seconds(seconds):
+    if seconds >= 3600:
+        return "%dh %02dm" %(seconds // 3600, seconds % 3600 // 60)
+    if seconds >= 60:
+        return "%dm %02ds" %(seconds // 60, seconds % 60)
+    return "%.1fs" %seconds
+
+
+def _draw_render_estimate(layout, context):
+    scene = context.scene
+    tmg_cam_vars = scene.tmg_cam_vars
+    camera = tmg_cam_vars.scene_camera
+
+    if not camera or camera.type != "CAMERA":
+        return
+
+    row = layout.row(align=True)
+    estimate = _estimate_render_seconds(scene, camera)
+
+    if estimate is None:
+        row.label(text="Estimate : Not probed", icon="TIME")
+    else:
+        frames = len(range(scene.frame_start, scene.frame_end + 1, max(1, scene.frame_step)))
+        approx = "~" if _estimate_is_approximate(scene) else ""
+        row.label(text="Estimate : %s%s / frame, %s%s / %s frames" %(approx, _format_seconds(estimate), approx, _format_seconds(estimate * frames), frames), icon="TIME")
+
+    row.operator("object.tmg_render_probe", text="", icon="FILE_REFRESH")
+
+
+class OBJECT_OT_TMG_Cam_Render_Probe(bpy.types.Operator):
+    """Render the active camera small with few samples and estimate the full render time"""
+    bl_idname = 'object.tmg_render_probe'
+    bl_label = 'Probe Render Time'
+
+    @classmethod
+    def poll(cls, context):
+        camera = context.scene.tmg_cam_vars.scene_camera
+        return camera and camera.type == "CAMERA"
+
+    def execute(self, context):
+        scene = context.scene
+        tmg_cam_vars = scene.tmg_cam_vars
+        camera = tmg_cam_vars.scene_camera
+
+        _run_render_probe(scene, camera, tmg_cam_vars.probe_percentage, tmg_cam_vars.probe_samples)
+        estimate = _estimate_render_seconds(scene, camera)
+
+        for job in tmg_cam_vars.render_jobs:
+            if job.camera == camera:
+                _update_render_job_eta(scene, job)
+
+        if estimate is not None:
+            self.report({'INFO'}, "Estimated %s per frame" %_format_seconds(estimate))
+
+        return {'FINISHED'}
+
+
+def _read_image_pixels(filepath):
+    image = bpy.data.images.load(filepath, check_existing=False)
+
+    try:
+        width, height = image.size
+        pixels = np.empty(width * height * 4, dtype=np.float32)
+        image.pixels.foreach_get(pixels)
+    finally:
+        bpy.data.images.remove(image)
+
+    return pixels.reshape(-1, 4)[:, :3]
+
+
+def _measure_seed_noise(scene, folder, samples):
+    ## Same frame rendered with two seeds, the difference is pure sampling
+    ## noise so std(a - b) / sqrt(2) is the noise of one render
+    cscene = scene.cycles
+    rd = scene.render
+    cscene.samples = samples
+    images = []
+
+    for seed in (0, 1):
+        cscene.seed = seed
+        rd.filepath = os.path.join(folder, "tmg_cam_tune_%s_%s.exr" %(samples, seed))
+
+        if 'FINISHED' not in bpy.ops.render.render(write_still=True, scene=scene.name):
+            raise RuntimeError("Render cancelled")
+
+        images.append(_read_image_pixels(rd.filepath))
+        os.remove(rd.filepath)
+
+    a, b = images
+    mean = max(float(np.mean((a + b) * 0.5)), 1e-4)
+    return float(np.std(a - b)) / np.sqrt(2.0) / mean
+
+
+## Adaptive thresholds tried once the sample count is known, coarsest first.
+## Cycles' threshold is a per pixel error estimate, not the image noise the
+## tuner measures, so the mapping between the two is measured too
+tune_threshold_steps = (0.1, 0.05, 0.02, 0.01, 0.005, 0.002)
+
+
+def _tune_camera_sampling(scene, camera, target, max_samples, percentage):
+    cscene = scene.cycles
+    rd = scene.render
+    settings = rd.image_settings
+
+    restore = (scene.camera, rd.filepath, rd.resolution_percentage, settings.file_format, settings.color_depth,
+               cscene.samples, cscene.seed, cscene.use_animated_seed, cscene.use_adaptive_sampling,
+               cscene.adaptive_threshold, cscene.adaptive_min_samples)
+
+    scene.camera = camera
+    rd.resolution_percentage = percentage
+    settings.file_format = 'OPEN_EXR'
+    settings.color_depth = '32'
+    cscene.use_animated_seed = False
+    cscene.use_adaptive_sampling = False
+
+    ## 0 lets Cycles derive the minimum from the threshold, stored as is so
+    ## the tune applies exactly what was measured
+    min_samples = 0
+    cscene.adaptive_min_samples = min_samples
+
+    folder = tempfile.mkdtemp(prefix="tmg_cam_tune_")
+    samples = 16
+    result = None
+    threshold = None
+    render_stats_state["suppress"] += 1
+
+    ## File Output nodes point at the camera's delivered frames
+    outputs = _mute_composite_outputs(scene)
+
+    try:
+        ## Double the sample count until the noise target is met, the first
+        ## count that gets there is the cheapest one
+        while samples <= max_samples:
+            noise = _measure_seed_noise(scene, folder, samples)
+            result = (samples, noise)
+
+            if noise <= target:
+                break
+
+            samples *= 2
+
+        ## Then the coarsest adaptive threshold that still meets the target
+        ## with that many samples as the cap
+        if result is not None and result[1] <= target:
+            samples = result[0]
+            cscene.use_adaptive_sampling = True
+
+            for step in tune_threshold_steps:
+                cscene.adaptive_threshold = step
+                noise = _measure_seed_noise(scene, folder, samples)
+
+                if noise <= target:
+                    threshold = step
+                    result = (samples, noise)
+                    break
+    finally:
+        render_stats_state["suppress"] -= 1
+        _apply_composite_outputs(scene, outputs)
+        (scene.camera, rd.filepath, rd.resolution_percentage, settings.file_format, settings.color_depth,
+         cscene.samples, cscene.seed, cscene.use_animated_seed, cscene.use_adaptive_sampling,
+         cscene.adaptive_threshold, cscene.adaptive_min_samples) = restore
+        shutil.rmtree(folder, ignore_errors=True)
+
+    if result is None:
+        return None
+
+    samples, noise = result
+    tmg_cam_settings = camera.tmg_cam_settings
+    tmg_cam_settings.tune_samples = samples
+
+    ## No threshold met the target, the plain sample count that was
+    ## measured is kept without adaptive sampling
+    tmg_cam_settings.tune_adaptive = threshold is not None
+    tmg_cam_settings.tune_min_samples = min_samples
+    if threshold is not None:
+        tmg_cam_settings.tune_threshold = threshold
+    tmg_cam_settings.tune_noise = noise
+    tmg_cam_settings.tuned = True
+
+    return result
+
+
+def _apply_sampling_tune(scene, camera):
+    tmg_cam_settings = camera.tmg_cam_settings
+
+    if not tmg_cam_settings.tuned or scene.render.engine != "CYCLES":
+        return
+
+    cscene = scene.cycles
+    _set_if_changed(cscene, "samples", tmg_cam_settings.tune_samples)
+    _set_if_changed(cscene, "use_adaptive_sampling", tmg_cam_settings.tune_adaptive)
+
+    if tmg_cam_settings.tune_adaptive:
+        _set_if_changed(cscene, "adaptive_threshold", tmg_cam_settings.tune_threshold)
+        _set_if_changed(cscene, "adaptive_min_samples", tmg_cam_settings.tune_min_samples)
+
+
+class OBJECT_OT_TMG_Cam_Tune_Sampling(bpy.types.Operator):
+    """Find the fewest Cycles samples that reach the noise target for the active camera"""
+    bl_idname = 'object.tmg_tune_sampling'
+    bl_label = 'Auto Tune Sampling'
+
+    @classmethod
+    def poll(cls, context):
+        camera = context.scene.tmg_cam_vars.scene_camera
+        return camera and camera.type == "CAMERA" and context.scene.render.engine == "CYCLES"
+
+    def execute(self, context):
+        scene = context.scene
+        tmg_cam_vars = scene.tmg_cam_vars
+        camera = tmg_cam_vars.scene_camera
+
+        try:
+            result = _tune_camera_sampling(scene, camera, tmg_cam_vars.tune_noise_target, tmg_cam_vars.tune_max_samples, tmg_cam_vars.probe_percentage)
+        except RuntimeError as error:
+            ## Cancelled or failed tuning render, nothing is stored
+            self.report({'ERROR'}, "Tuning render failed : %s" %error)
+            return {'CANCELLED'}
+
+        if result is None:
+            self.report({'WARNING'}, "Max samples is below the first probe")
+            return {'CANCELLED'}
+
+        samples, noise = result
+        _apply_sampling_tune(scene, camera)
+
+        if noise > tmg_cam_vars.tune_noise_target:
+            self.report({'WARNING'}, "Noise target not reached, using %s samples (noise %.4f)" %(samples, noise))
+        else:
+            self.report({'INFO'}, "Tuned to %s samples (noise %.4f)" %(samples, noise))
+
+        return {'FINISHED'}
+
+
+def _optimize_grid(scene):
+    rd = scene.render
+    longest = max(rd.resolution_x, rd.resolution_y) * rd.resolution_percentage // 100
+    cores = os.cpu_count() or 1
+
+    tiles = [0] + [size for size in (256, 512, 1024, 2048, 4096) if size < longest * 2]
+    threads = sorted({0, max(1, cores // 4), max(1, cores // 2), cores})
+    return [(tile, thread) for tile in tiles for thread in threads]
+
+
+def _optimize_resolution(scene):
+    ## Pixel size a tune was measured at, tile / thread winners don't carry
+    ## over to other sizes
+    rd = scene.render
+    scale = rd.resolution_percentage / 100
+    return "%sx%s" %(int(rd.resolution_x * scale), int(rd.resolution_y * scale))
+
+
+def _optimize_camera_performance(scene, camera, samples):
+    cscene = scene.cycles
+    rd = scene.render
+
+    restore = (scene.camera, cscene.samples, cscene.use_auto_tile, cscene.tile_size, rd.threads_mode, rd.threads)
+    scene.camera = camera
+    cscene.samples = samples
+    timings = []
+    render_stats_state["suppress"] += 1
+
+    ## File Output nodes point at the camera's delivered frames
+    outputs = _mute_composite_outputs(scene)
+
+    try:
+        ## Untimed warm up, kernel / shader compile and the BVH build would
+        ## otherwise all land on the first combination
+        bpy.ops.render.render(scene=scene.name)
+
+        for tile, thread in _optimize_grid(scene):
+            cscene.use_auto_tile = bool(tile)
+            if tile:
+                cscene.tile_size = tile
+
+            rd.threads_mode = 'FIXED' if thread else 'AUTO'
+            if thread:
+                rd.threads = thread
+
+            start = time.time()
+            bpy.ops.render.render(scene=scene.name)
+            timings.append((time.time() - start, tile, thread))
+    finally:
+        render_stats_state["suppress"] -= 1
+        _apply_composite_outputs(scene, outputs)
+        (scene.camera, cscene.samples, cscene.use_auto_tile, cscene.tile_size, rd.threads_mode, rd.threads) = restore
+
+    seconds, tile, thread = min(timings)
+
+    tmg_cam_settings = camera.tmg_cam_settings
+    tmg_cam_settings.optimized = True
+    tmg_cam_settings.opt_tile_size = tile
+    tmg_cam_settings.opt_threads = thread
+    tmg_cam_settings.opt_seconds = seconds
+    tmg_cam_settings.opt_resolution = _optimize_resolution(scene)
+
+    return seconds, tile, thread, len(timings)
+
+
+def _apply_performance_tune(scene, camera):
+    tmg_cam_settings = camera.tmg_cam_settings
+
+    if not tmg_cam_settings.optimized or scene.render.engine != "CYCLES":
+        return
+
+    if tmg_cam_settings.opt_resolution != _optimize_resolution(scene):
+        return
+
+    cscene = scene.cycles
+    rd = scene.render
+
+    _set_if_changed(cscene, "use_auto_tile", bool(tmg_cam_settings.opt_tile_size))
+    if tmg_cam_settings.opt_tile_size:
+        _set_if_changed(cscene, "tile_size", tmg_cam_settings.opt_tile_size)
+
+    _set_if_changed(rd, "threads_mode", 'FIXED' if tmg_cam_settings.opt_threads else 'AUTO')
+    if tmg_cam_settings.opt_threads:
+        _set_if_changed(rd, "threads", tmg_cam_settings.opt_threads)
+
+
+def _draw_performance_tune(layout, camera):
+    tmg_cam_settings = camera.tmg_cam_settings
+
+    row = layout.row(align=True)
+    row.operator("object.tmg_optimize_performance", text="Optimize", icon="PREFERENCES")
+
+    if tmg_cam_settings.optimized:
+        tiles = tmg_cam_settings.opt_tile_size or "Off"
+        threads = tmg_cam_settings.opt_threads or "Auto"
+        row.label(text="Tiles %s, Threads %s @ %s" %(tiles, threads, tmg_cam_settings.opt_resolution))
+
+        if tmg_cam_settings.opt_resolution != _optimize_resolution(bpy.context.scene):
+            layout.label(text="Measured at another resolution, not applied", icon="INFO")
+
+
+class OBJECT_OT_TMG_Cam_Optimize_Performance(bpy.types.Operator):
+    """Time probe renders of the active camera over tile sizes and thread counts and keep the fastest"""
+    bl_idname = 'object.tmg_optimize_performance'
+    bl_label = 'Optimize Tiles and Threads'
+
+    @classmethod
+    def poll(cls, context):
+        camera = context.scene.tmg_cam_vars.scene_camera
+        return camera and camera.type == "CAMERA" and context.scene.render.engine == "CYCLES"
+
+    def execute(self, context):
+        scene = context.scene
+        tmg_cam_vars = scene.tmg_cam_vars
+        camera = tmg_cam_vars.scene_camera
+
+        seconds, tile, thread, count = _optimize_camera_performance(scene, camera, tmg_cam_vars.probe_samples)
+        _apply_performance_tune(scene, camera)
+
+        self.report({'INFO'}, "Fastest of %s : tiles %s, threads %s (%s)" %(count, tile or "off", thread or "auto", _format_seconds(seconds)))
+        return {'FINISHED'}
+
+
+class OBJECT_OT_TMG_Cam_Randomize_Selected_Light(bpy.types.Operator):
+    """Randomizes selected light values"""
+    bl_idname = 'object.tmg_randomize_light'
+    bl_label = 'Randomize'
+    bl_options = {'REGISTER', 'UNDO'}
+    
+    def execute(self, context):
+        scene = context.scene
+        tmg_cam_vars = scene.tmg_cam_vars
+
+        ## Unique light datablocks, a shared light is only randomized once
+        lights = {}
+        obs = [bpy.context.active_object] + list(bpy.context.selected_objects)
+
+        for ob in obs:
+            if ob and ob.type == "LIGHT" and not ob.data.library:
+                lights.setdefault(ob.data.name_full, ob.data)
+
+        _randomize_lights(scene, list(lights.values()))
+        return {'FINISHED'}
+
+
+class TMG_Cam_Camera_Settings(bpy.types.PropertyGroup):
+    render_path : StringProperty(name="Path", description="Camera render directory", default="//", maxlen=1024, subtype='DIR_PATH')
+    render_filename : StringProperty(name="Filename", description="Camera render file name", default="image", maxlen=1024)
+
+    res_x : bpy.props.IntProperty(name='Resolution X', default=1920, min=4, subtype='PIXEL')
+    res_y : bpy.props.IntProperty(name='Resolution Y', default=1080, min=4, subtype='PIXEL')
+
+    resolution : bpy.props.IntProperty(name='Resolution Preset', default=0, min=0, max=5)
+    res_mode : bpy.props.IntProperty(name='Aspect Preset', default=0, min=0, max=2)
+    sensor_profile : bpy.props.IntProperty(name='Sensor Profile', default=2, min=0, max=4)
+
+    ## Render time probe, seconds per pixel per sample plus fixed setup time
+    probe_engine : StringProperty(default="")
+    probe_sample_cost : bpy.props.FloatProperty(default=0.0, min=0.0, precision=12)
+    probe_overhead : bpy.props.FloatProperty(default=0.0, min=0.0, subtype='TIME_ABSOLUTE')
+
+    ## Cycles sampling picked by the auto tuner
+    tuned : bpy.props.BoolProperty(default=False)
+    tune_samples : bpy.props.IntProperty(default=4096, min=1)
+    tune_adaptive : bpy.props.BoolProperty(default=True)
+    tune_min_samples : bpy.props.IntProperty(default=0, min=0)
+    tune_threshold : bpy.props.FloatProperty(default=0.01, min=0.0, precision=4)
+    tune_noise : bpy.props.FloatProperty(default=0.0, min=0.0, precision=4)
+
+    ## Fastest tile size / thread count found by Optimize, 0 means off / auto
+    optimized : bpy.props.BoolProperty(default=False)
+    opt_tile_size : bpy.props.IntProperty(default=0, min=0)
+    opt_threads : bpy.props.IntProperty(default=0, min=0)
+    opt_seconds : bpy.props.FloatProperty(default=0.0, min=0.0)
+    opt_resolution : StringProperty(default="")
+
+    ## Set once the old custom properties have been copied over
+    migrated : bpy.props.BoolProperty(default=False)
+
+
+def _tmg_render_job_camera_changed(self, context):
+    if self.camera and self.camera.type == "CAMERA":
+        self.name = self.camera.name
+
+    _update_render_job_eta(context.scene, self)
+
+
+def _tmg_render_job_changed(self, context):
+    _update_render_job_eta(context.scene, self)
+
+
+class TMG_Cam_Render_Job(bpy.types.PropertyGroup):
+    use : bpy.props.BoolProperty(name='Use', default=True, description='Render this job when running the queue')
+    camera : bpy.props.PointerProperty(name='Camera', type=bpy.types.Object, poll=_tmg_search_cameras, update=_tmg_render_job_camera_changed)
+
+    use_animation : bpy.props.BoolProperty(name='Animation', default=False, description='Render the frame range instead of the current frame', update=_tmg_render_job_changed)
+    frame_start : bpy.props.IntProperty(name='Start', default=1, min=0, update=_tmg_render_job_changed)
+    frame_end : bpy.props.IntProperty(name='End', default=250, min=0, update=_tmg_render_job_changed)
+
+    resolution : bpy.props.EnumProperty(name='Resolution', default='CAMERA', description='Resolution used for this job',
+    items=[
+    ('SCENE', 'Scene', 'Keep the scene resolution'),
+    ('CAMERA', 'Camera', 'Use the resolution stored on the camera'),
+    ('0', 'VGA', ''),
+    ('1', 'HD', ''),
+    ('2', 'HD-F', ''),
+    ('3', '2k', ''),
+    ('4', '4k', ''),
+    ('5', '8k', '')], update=_tmg_render_job_changed)
+
+    render_path : StringProperty(name="Path", description="Output directory, leave empty to use the camera's render path", default="", maxlen=1024, subtype='DIR_PATH')
+
+    status : bpy.props.EnumProperty(name='Status', default='QUEUED',
+    items=[
+    ('QUEUED', 'Queued', '', 'TIME', 0),
+    ('RENDERING', 'Rendering', '', 'RENDER_STILL', 1),
+    ('DONE', 'Done', '', 'CHECKMARK', 2),
+    ('FAILED', 'Failed', '', 'ERROR', 3),
+    ('SKIPPED', 'Skipped', '', 'CANCEL', 4)])
+
+    ## Seconds per frame from the camera's probe, -1 when it has none
+    eta_frame : bpy.props.FloatProperty(name='Frame Estimate', default=-1.0)
+    eta_frames : bpy.props.IntProperty(name='Frames', default=1, min=0)
+    eta_key : StringProperty(default="")
+
+
+class TMG_Cam_List_Item(bpy.types.PropertyGroup):
+    camera : bpy.props.PointerProperty(name='Camera', type=bpy.types.Object)
+
+
+render_delivery_extensions = {
+    'PNG' : ".png",
+    'JPEG' : ".jpg",
+    'TIFF' : ".tif",
+    'WEBP' : ".webp",
+}
+
+
+class TMG_Cam_Delivery(bpy.types.PropertyGroup):
+    use : bpy.props.BoolProperty(name='Use', default=True, description='Write this delivery format')
+
+    file_format : bpy.props.EnumProperty(name='Format', default='PNG',
+    items=[
+    ('PNG', 'PNG', ''),
+    ('JPEG', 'JPEG', ''),
+    ('TIFF', 'TIFF', ''),
+    ('WEBP', 'WebP', '')])
+
+    color_depth : bpy.props.EnumProperty(name='Depth', default='8', description='Bit depth, PNG and TIFF only',
+    items=[
+    ('8', '8', ''),
+    ('16', '16', '')])
+
+    view_transform : StringProperty(name="View", description="View transform applied to the scene linear master", default="Standard")
+    look : StringProperty(name="Look", description="Look applied with the view transform", default="None")
+    scale : bpy.props.IntProperty(name='Scale', default=100, min=1, max=100, subtype='PERCENTAGE', description='Downscale relative to the master')
+    quality : bpy.props.IntProperty(name='Quality', default=90, min=0, max=100, subtype='PERCENTAGE', description='Compression quality for JPEG / WebP')
 
 
 class TMG_Cam_Properties(bpy.types.PropertyGroup):
     scene_camera : bpy.props.PointerProperty(name='Camera', type=bpy.types.Object, poll=_tmg_search_cameras, description='Scene active camera', update=_change_scene_camera)
     cam_name : bpy.props.StringProperty(name='Camera', default='Camera', update=_change_scene_camera)
 
+    camera_list : bpy.props.CollectionProperty(type=TMG_Cam_List_Item)
+    camera_list_index : bpy.props.IntProperty(default=0, update=_camera_list_index_changed)
+
+    render_jobs : bpy.props.CollectionProperty(type=TMG_Cam_Render_Job)
+    render_jobs_index : bpy.props.IntProperty(default=0)
+
+    memory_budget : bpy.props.IntProperty(name='Budget (GB)', default=64, min=1, max=4096, description='Memory available on a render node, the estimate warns above this')
+    prune_keep_multilayer : bpy.props.BoolProperty(name='Keep Multilayer Passes', default=True, description='Count passes written to a multilayer EXR output as used')
+    deliveries : bpy.props.CollectionProperty(type=TMG_Cam_Delivery)
+    deliveries_index : bpy.props.IntProperty(default=0)
+    use_delivery : bpy.props.BoolProperty(name='Delivery', default=False, description='Convert every finished EXR from the queue or farm into the delivery formats')
+    delivery_workers : bpy.props.IntProperty(name='Workers', default=2, min=1, max=64, description='Background Blender processes converting deliveries')
+    farm_workers : bpy.props.IntProperty(name='Workers', default=4, min=1, max=256, description='Background Blender processes to start')
+    farm_threads : bpy.props.IntProperty(name='Threads', default=0, min=0, max=1024, description='Render threads per worker, 0 splits the CPU cores between workers')
+    farm_chunk : bpy.props.IntProperty(name='Chunk', default=10, min=1, description='Frames handed to a worker at a time')
+
+    stats_window : bpy.props.IntProperty(name='Window', default=20, min=1, max=1000, description='Recent frames per camera used for the statistics')
+
+    border_padding : bpy.props.FloatProperty(name='Border Padding', default=0.02, min=0.0, max=0.5, subtype='FACTOR', description='Margin added around the selection, as a fraction of the frame')
+    use_async_output : bpy.props.BoolProperty(name='Async Output', default=False, description='Write queue renders on background threads while the next frame renders (EXR, or PNG with the Standard view transform, needs compositing nodes)')
+    output_threads : bpy.props.IntProperty(name='Writer Threads', default=2, min=1, max=16, description='Threads encoding and writing output files')
+    output_memory : bpy.props.IntProperty(name='Writer Memory', default=2048, min=64, max=65536, subtype='NONE', description='Megabytes of frames allowed to wait for writing before rendering pauses')
+    use_batch_grouping : bpy.props.BoolProperty(name='Group Batch', default=False, description='Order queued renders by frame and resolution and keep persistent data on so cameras share one scene sync')
+    use_render_cache : bpy.props.BoolProperty(name='Render Cache', default=False, description='Skip frames whose camera, render settings, evaluated geometry, materials, lights, world, compositor and animation match a cached render. Scenes with simulations or time dependent modifiers only reuse the current frame. Image files changed on disk, UVs and library edits are not detected')
+    render_cache_path : StringProperty(name="Cache", description="Folder cached renders are stored in", default="//tmg_cam_cache/", maxlen=1024, subtype='DIR_PATH')
+
+    probe_percentage : bpy.props.IntProperty(name='Probe Size', default=10, min=1, max=50, subtype='PERCENTAGE', description='Resolution percentage used by probe renders')
+    probe_samples : bpy.props.IntProperty(name='Probe Samples', default=8, min=1, max=256, description='Samples used by the first probe render, the second uses twice as many')
+
+    tune_noise_target : bpy.props.FloatProperty(name='Noise Target', default=0.02, min=0.001, max=1.0, precision=3, description='Relative noise the auto tuner aims for, also used as the adaptive threshold')
+    tune_max_samples : bpy.props.IntProperty(name='Max Samples', default=4096, min=16, max=16777216, description='Highest sample count the auto tuner will try')
+
     camera_name_lock : bpy.props.BoolProperty(name='Linked Name', default=True)
     camera_name : bpy.props.StringProperty(name='Object', default='Camera', update=_rename_camera)
     camera_data_name : bpy.props.StringProperty(name='Data', default='Camera', update=_rename_camera_data)
@@ -904,7 +3728,7 @@ class TMG_Cam_Properties(bpy.types.PropertyGroup):
 
     render_path : StringProperty(name="Path",description="Path to Directory",default="//",maxlen=1024,subtype='DIR_PATH', update=_render_path_changed)
     render_slot : bpy.props.IntProperty(default=1, min=1, max=8, options={'ANIMATABLE'}, update=_set_render_slot)
-    render_filename : StringProperty(name="Filename",description="Render file name",default="image.",maxlen=1024, update=_render_filename_changed)
+    render_filename : StringProperty(name="Filename",description="Render file name, tokens : {camera} {scene} {frame:04} {res} {engine} {pass}",default="image.",maxlen=1024, update=_render_filename_changed)
     
     curve_lock_scale : bpy.props.BoolProperty(default=False)
     curve_size_x : bpy.props.FloatProperty(default=1, min=0.01, update=_curve_size)
@@ -979,7 +3803,7 @@ class TMG_Cam_Properties(bpy.types.PropertyGroup):
     items=[
     ('PERSP', 'Perspective', ''),
     ('ORTHO', 'Orthographic', ''),
-    ('PANO', 'Panoramic', '')], update=_set_cam_values)
+    ('PANO', 'Panoramic', '')])
     
     cam_resolution_presets : bpy.props.EnumProperty(name='Resolution', default='2', description='Different render resolution presets',
     items=[
@@ -1034,6 +3858,13 @@ class OBJECT_PT_TMG_Cam_SelectOB(Operator):
         scene = context.scene
         tmg_cam_vars = scene.tmg_cam_vars
 
+        if self.name not in camera_index.get(scene.name, ()):
+            _rebuild_camera_index(scene)
+
+        if self.name not in camera_index[scene.name]:
+            self.report({'WARNING'}, "Camera %s not found in scene" %self.name)
+            return {'CANCELLED'}
+
         bpy.context.space_data.camera = bpy.data.objects[self.name]
         tmg_cam_vars.scene_camera = bpy.context.space_data.camera
 
@@ -1058,9 +3889,12 @@ class OBJECT_PT_TMG_Cam_DeleteOB(Operator):
             bpy.context.space_data.camera = None
             tag_redraw(context)
 
-        if bpy.data.objects[self.name]:
+        if bpy.data.objects.get(self.name):
             bpy.data.objects.remove(bpy.data.objects[self.name], do_unlink=True)
 
+        camera_index.get(scene.name, set()).discard(self.name)
+        _queue_camera_list_sync(scene)
+
         return {'FINISHED'}
 
 
@@ -1114,6 +3948,62 @@ class OBJECT_PT_TMG_Cam_Panel(bpy.types.Panel):
             row.label(text='Select a camera to begin')
         
 
+class OBJECT_UL_TMG_Cam_List(bpy.types.UIList):
+    """Scene cameras, filtered through the cached name index"""
+
+    bl_idname = "OBJECT_UL_TMG_Cam_List"
+
+    use_filter_prefix : bpy.props.BoolProperty(name='Prefix', default=False, description='Only match names starting with the filter')
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        ob = item.camera
+
+        if ob:
+            row = layout.row(align=True)
+
+            if context.space_data.camera == ob:
+                row.label(text=ob.name, icon="RESTRICT_SELECT_OFF")
+            else:
+                row.label(text=ob.name, icon="OUTLINER_OB_CAMERA")
+
+            prop = row.operator("tmg_cam.delete_ob", text='', icon="TRASH", emboss=False)
+            prop.name = ob.name
+
+    def draw_filter(self, context, layout):
+        row = layout.row(align=True)
+        row.prop(self, "filter_name", text="")
+        row.prop(self, "use_filter_prefix", text="", icon="TRIA_RIGHT_BAR")
+        row.prop(self, "use_filter_invert", text="", icon="ARROW_LEFTRIGHT")
+
+        row = layout.row(align=True)
+        row.prop(self, "use_filter_sort_alpha", text="", icon="SORTALPHA")
+        row.prop(self, "use_filter_sort_reverse", text="", icon="SORT_DESC" if self.use_filter_sort_reverse else "SORT_ASC")
+
+    def filter_items(self, context, data, propname):
+        items = getattr(data, propname)
+        key, names, order, rank, sorted_names = _get_camera_list_names(context.scene, items)
+        count = len(names)
+        pattern = self.filter_name.lower()
+
+        if not pattern:
+            flags = [self.bitflag_filter_item] * count
+
+        elif self.use_filter_prefix:
+            flags = [0] * count
+            start = bisect_left(sorted_names, pattern)
+            end = bisect_right(sorted_names, pattern + "\uffff")
+            for i in order[start:end]:
+                flags[i] = self.bitflag_filter_item
+
+        else:
+            flags = [self.bitflag_filter_item if pattern in name else 0 for name in names]
+
+        if self.use_filter_sort_alpha:
+            return flags, rank
+
+        return flags, []
+
+
 class OBJECT_PT_TMG_Cam_Panel_List(bpy.types.Panel):
     bl_idname = "OBJECT_PT_tmg_cam_panel_list"
     bl_label = ""
@@ -1125,44 +4015,23 @@ class OBJECT_PT_TMG_Cam_Panel_List(bpy.types.Panel):
     def draw_header(self, context):
         layout = self.layout
 
-        objs = []
-        for ob in bpy.context.scene.objects:
-            if ob.type == "CAMERA":
-                objs.append(ob)
+        objs = _get_scene_cameras(context.scene)
 
         layout.label(text="Cameras : %s" %len(objs))
         
 
     def draw(self, context):
-        scene = context.scene
-        props = scene.eevee
-        tmg_cam_vars = scene.tmg_cam_vars
-        layout = self.layout
-             
-        objs = []
-
-        for ob in bpy.context.scene.objects:
-            if ob.type == "CAMERA":
-                objs.append(ob)
-
-        box = layout.box()
-        col = box.column(align=False)
-        row = col.row(align=True)
-
-        if len(objs) < 1: 
-            col.label(text="No Objects in Scene")
-
-        for ob in objs:
-            row = col.row(align=True)
+        scene = context.scene
+        tmg_cam_vars = scene.tmg_cam_vars
+        layout = self.layout
 
-            if bpy.context.space_data.camera == ob:
-                prop = row.operator("tmg_cam.select_ob", text=ob.name, emboss=False) #  icon="RESTRICT_SELECT_OFF",
-            else:
-                prop = row.operator("tmg_cam.select_ob", text=ob.name, emboss=True) #  icon="RESTRICT_SELECT_ON",
-            prop.name = ob.name
+        if len(tmg_cam_vars.camera_list) < 1:
+            box = layout.box()
+            box.label(text="No Objects in Scene")
+            return
 
-            prop = row.operator("tmg_cam.delete_ob", text='', icon="TRASH")
-            prop.name = ob.name      
+        ## Only the visible rows get built, scroll or drag the list to page
+        layout.template_list("OBJECT_UL_TMG_Cam_List", "", tmg_cam_vars, "camera_list", tmg_cam_vars, "camera_list_index", rows=8, maxrows=16)
 
 
 class OBJECT_PT_TMG_Cam_Panel_Name(bpy.types.Panel):
@@ -1581,109 +4450,959 @@ class OBJECT_PT_TMG_Cam_Constraints_Panel_Track_To(bpy.types.Panel):
                 props = row.operator("object.tmg_remove_constraint", text='', icon="X")
                 props.con = "TRACK_TO"
 
-#                row = layout.row(align=True)
-                layout.prop(cn, 'target')
-                layout.prop(cn, 'influence')
-            except:
-                cn = None  
-                c1 = row.row(align=True)
-                c2 = row.row(align=True)
+#                row = layout.row(align=True)
+                layout.prop(cn, 'target')
+                layout.prop(cn, 'influence')
+            except:
+                cn = None  
+                c1 = row.row(align=True)
+                c2 = row.row(align=True)
+
+                props = c1.operator("object.tmg_add_constraint", text='', icon="CON_TRACKTO")
+                props.con = "TRACK_TO"
+                c1.enabled = True
+                
+                c2.enabled = False
+                
+                props = c2.operator("object.tmg_move_constraint", text='', icon="TRIA_UP")
+                props.con = "TRACK_TO"
+                props.dir = "UP"
+                
+                props = c2.operator("object.tmg_move_constraint", text='', icon="TRIA_DOWN")
+                props.con = "TRACK_TO"
+                props.dir = "DOWN"
+                
+                props = c2.operator("object.tmg_remove_constraint", text='', icon="X")
+                props.con = "TRACK_TO"
+   
+   
+class OBJECT_PT_TMG_Cam_Output_Panel(bpy.types.Panel):
+    bl_idname = 'OBJECT_PT_tmg_cam_output_panel'
+    bl_category = 'TMG Camera'
+    bl_label = 'Output'
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_parent_id = "OBJECT_PT_tmg_cam_parent_panel"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        pass      
+         
+            
+class OBJECT_OT_TMG_Cam_Render_Border(bpy.types.Operator):
+    """Render only the part of the frame covered by the selected objects"""
+    bl_idname = 'object.tmg_render_border'
+    bl_label = 'Render Selection Border'
+
+    @classmethod
+    def poll(cls, context):
+        camera = context.scene.tmg_cam_vars.scene_camera
+        return camera and camera.type == "CAMERA" and context.selected_objects and render_border_state["restore"] is None
+
+    def execute(self, context):
+        scene = context.scene
+        tmg_cam_vars = scene.tmg_cam_vars
+        camera = tmg_cam_vars.scene_camera
+
+        objects = [ob for ob in context.selected_objects if ob != camera]
+        border = _selected_render_border(scene, camera, objects, tmg_cam_vars.border_padding)
+
+        if border is None:
+            self.report({'WARNING'}, "Selection is outside the camera frame")
+            return {'CANCELLED'}
+
+        _set_render_border(scene, camera, border)
+
+        bpy.app.handlers.render_complete.append(_restore_render_border)
+        bpy.app.handlers.render_cancel.append(_restore_render_border)
+
+        if 'RUNNING_MODAL' not in bpy.ops.render.render('INVOKE_DEFAULT'):
+            _restore_render_border()
+            return {'CANCELLED'}
+
+        return {'FINISHED'}
+
+
+class OBJECT_OT_TMG_Cam_Render_Preview(bpy.types.Operator):
+    """Render the active camera at 25%, 50% then 100% into consecutive render slots, cancel the render to stop"""
+    bl_idname = 'object.tmg_render_preview'
+    bl_label = 'Preview Render'
+
+    _timer = None
+
+    @classmethod
+    def poll(cls, context):
+        camera = context.scene.tmg_cam_vars.scene_camera
+        return camera and camera.type == "CAMERA" and not render_preview_state["running"]
+
+    def execute(self, context):
+        scene = context.scene
+
+        if bpy.app.background:
+            _run_render_preview(scene)
+            return {'FINISHED'}
+
+        _render_preview_begin(scene)
+        render_preview_state["running"] = True
+
+        bpy.app.handlers.render_complete.append(_render_preview_complete)
+        bpy.app.handlers.render_cancel.append(_render_preview_cancel)
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.2, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            render_preview_state["cancel"] = True
+
+        if event.type != 'TIMER' or render_preview_state["rendering"]:
+            return {'PASS_THROUGH'}
+
+        scene = context.scene
+        step = render_preview_state["step"]
+
+        if render_preview_state["cancel"] or step >= len(render_preview_steps):
+            return self.finish(context)
+
+        _render_preview_prepare(scene, step)
+        render_preview_state["step"] += 1
+        render_preview_state["rendering"] = True
+
+        if 'RUNNING_MODAL' not in bpy.ops.render.render('INVOKE_DEFAULT'):
+            return self.finish(context)
+
+        return {'PASS_THROUGH'}
+
+    def finish(self, context):
+        context.window_manager.event_timer_remove(self._timer)
+        _render_preview_end(context.scene)
+        return {'FINISHED'}
+
+
+class OBJECT_OT_TMG_Cam_Render_Multiview(bpy.types.Operator):
+    """Render all selected cameras in one render using multiview, each view is saved to its camera's output path"""
+    bl_idname = 'object.tmg_render_multiview'
+    bl_label = 'Render Selected Cameras'
+
+    @classmethod
+    def poll(cls, context):
+        return any(ob.type == "CAMERA" for ob in context.selected_objects)
+
+    def execute(self, context):
+        scene = context.scene
+        cameras = sorted((ob for ob in context.selected_objects if ob.type == "CAMERA"), key=lambda ob: ob.name)
+
+        written, skipped = _render_multiview(scene, cameras)
+
+        if skipped:
+            self.report({'WARNING'}, "Rendered %s of %s cameras, skipped : %s" %(len(written), len(cameras), ", ".join(skipped)))
+        else:
+            self.report({'INFO'}, "Rendered %s cameras in one pass" %len(written))
+
+        return {'FINISHED'}
+
+
+class OBJECT_OT_TMG_Cam_Tag_File_Output(bpy.types.Operator):
+    """Only write the selected compositor File Output nodes when the active camera renders, or clear their tag"""
+    bl_idname = 'object.tmg_tag_file_output'
+    bl_label = 'Tag File Outputs'
+
+    clear : bpy.props.BoolProperty(name='Clear', default=False)
+
+    @classmethod
+    def poll(cls, context):
+        scene = context.scene
+        camera = scene.tmg_cam_vars.scene_camera
+        return scene.use_nodes and scene.node_tree and camera and camera.type == "CAMERA"
+
+    def execute(self, context):
+        scene = context.scene
+        camera = scene.tmg_cam_vars.scene_camera
+        count = 0
+
+        for node in _get_composite_outputs(scene):
+            if not node.select:
+                continue
+
+            if self.clear:
+                node.tmg_cam_camera = None
+                _set_if_changed(node, "mute", False)
+            else:
+                node.tmg_cam_camera = camera
+            count += 1
+
+        if not count:
+            self.report({'WARNING'}, "No File Output nodes selected in the compositor")
+            return {'CANCELLED'}
+
+        _update_composite_output(scene, context)
+        return {'FINISHED'}
+
+
+class OBJECT_PT_TMG_Cam_Output_Panel_Image(bpy.types.Panel):
+    bl_idname = "OBJECT_PT_tmg_cam_output_panel_image"
+    bl_label = "Image"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_parent_id = "OBJECT_PT_tmg_cam_output_panel"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        scene = context.scene
+        # props = scene.eevee
+        tmg_cam_vars = scene.tmg_cam_vars
+        
+        if tmg_cam_vars.scene_camera and tmg_cam_vars.scene_camera.type == "CAMERA":
+            layout = self.layout
+            layout.use_property_split = True
+            layout.use_property_decorate = False  # No animation.
+
+            layout.prop(tmg_cam_vars, 'render_path', text='')
+            layout.prop(tmg_cam_vars, 'render_filename', text='')
+            
+            row = layout.row(align=True)
+            row.operator("render.render", text='Image', icon="CAMERA_DATA")
+            row.operator("render.render", text='Animation', icon="RENDER_ANIMATION").animation=True
+
+            row = layout.row(align=True)
+            row.operator("object.tmg_render_preview", text='Preview', icon="IMAGE_ZDEPTH")
+            row.operator("object.tmg_render_multiview", text='Selected Cameras', icon="OUTLINER_OB_CAMERA")
+
+            row = layout.row(align=True)
+            row.operator("object.tmg_render_border", text='Selection', icon="SELECT_SET")
+            row.prop(tmg_cam_vars, 'border_padding', text='Padding')
+            
+            layout.prop(tmg_cam_vars, 'render_slot', text='Render Slot')
+
+            if scene.use_nodes and scene.node_tree:
+                row = layout.row(align=True)
+                row.label(text="File Outputs : %s" %len(_get_composite_outputs(scene)), icon="NODE_COMPOSITING")
+                row.operator("object.tmg_tag_file_output", text="", icon="BOOKMARKS").clear = False
+                row.operator("object.tmg_tag_file_output", text="", icon="X").clear = True
+
+
+class OBJECT_PT_TMG_Cam_Output_Panel_Image_Settings(bpy.types.Panel):
+    bl_idname = "OBJECT_PT_tmg_cam_output_panel_image_settings"
+    bl_label = "Image Settings"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_parent_id = "OBJECT_PT_tmg_cam_output_panel"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        scene = context.scene
+        props = scene.eevee
+        tmg_cam_vars = scene.tmg_cam_vars
+        
+        if tmg_cam_vars.scene_camera and tmg_cam_vars.scene_camera.type == "CAMERA":
+            layout = self.layout
+            layout.use_property_split = True
+            layout.use_property_decorate = False  # No animation.
+
+            rd = context.scene.render
+            image_settings = rd.image_settings
+
+            layout.prop(scene, 'use_nodes')
+
+            layout = layout.column(heading="Saving")
+            layout.prop(rd, "use_file_extension")
+            layout.prop(rd, "use_render_cache")
+
+            layout.prop(scene.render.image_settings, 'file_format')
+            layout.prop(scene.render.image_settings, 'color_mode')
+
+            if not rd.is_movie_format:
+                layout = layout.column(heading="Image Sequence")
+                layout.prop(rd, "use_overwrite")
+                layout.prop(rd, "use_placeholder")
+
+
+class OBJECT_UL_TMG_Cam_Render_Jobs(bpy.types.UIList):
+    """Render queue jobs"""
+
+    bl_idname = "OBJECT_UL_TMG_Cam_Render_Jobs"
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row(align=True)
+        row.prop(item, "use", text="")
+
+        if item.camera:
+            row.label(text=item.camera.name)
+        else:
+            row.label(text="No Camera", icon="ERROR")
+
+        if item.use_animation:
+            row.label(text="%s - %s" %(item.frame_start, item.frame_end))
+
+        row.prop(item, "status", text="", icon_only=True, emboss=False)
+
+
+class OBJECT_OT_TMG_Cam_Render_Queue_Add(bpy.types.Operator):
+    """Add render jobs for cameras"""
+    bl_idname = 'object.tmg_render_queue_add'
+    bl_label = 'Add Render Jobs'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    mode : bpy.props.EnumProperty(name='Cameras', default='ACTIVE',
+    items=[
+    ('ACTIVE', 'Active', 'Add the active scene camera'),
+    ('SELECTED', 'Selected', 'Add all selected cameras'),
+    ('ALL', 'All', 'Add every camera in the scene')])
+
+    def execute(self, context):
+        scene = context.scene
+        tmg_cam_vars = scene.tmg_cam_vars
+
+        if self.mode == 'ACTIVE':
+            cameras = [tmg_cam_vars.scene_camera] if tmg_cam_vars.scene_camera else []
+        elif self.mode == 'SELECTED':
+            cameras = [ob for ob in context.selected_objects if ob.type == "CAMERA"]
+        else:
+            cameras = _get_scene_cameras(scene)
+
+        for camera in cameras:
+            job = tmg_cam_vars.render_jobs.add()
+            job.camera = camera
+            job.frame_start = scene.frame_start
+            job.frame_end = scene.frame_end
+            _update_render_job_eta(scene, job)
+
+        tmg_cam_vars.render_jobs_index = len(tmg_cam_vars.render_jobs) - 1
+        return {'FINISHED'}
+
+
+class OBJECT_OT_TMG_Cam_Render_Queue_Remove(bpy.types.Operator):
+    """Remove the active render job"""
+    bl_idname = 'object.tmg_render_queue_remove'
+    bl_label = 'Remove Render Job'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        tmg_cam_vars = context.scene.tmg_cam_vars
+        index = tmg_cam_vars.render_jobs_index
+
+        if 0 <= index < len(tmg_cam_vars.render_jobs):
+            tmg_cam_vars.render_jobs.remove(index)
+            tmg_cam_vars.render_jobs_index = min(index, len(tmg_cam_vars.render_jobs) - 1)
+
+        return {'FINISHED'}
+
+
+class OBJECT_OT_TMG_Cam_Render_Queue_Run(bpy.types.Operator):
+    """Render every enabled job back to back, press Esc to stop after the current frame"""
+    bl_idname = 'object.tmg_render_queue_run'
+    bl_label = 'Render Queue'
+
+    resume : bpy.props.BoolProperty(name='Resume', default=False, description='Skip frames the job journal lists as finished and whose files exist')
+
+    _timer = None
+
+    @classmethod
+    def poll(cls, context):
+        return not render_queue_state["running"] and len(context.scene.tmg_cam_vars.render_jobs) > 0
+
+    def execute(self, context):
+        scene = context.scene
+        units = _queue_render_units(scene, scene.tmg_cam_vars.render_jobs, self.resume)
+
+        if not units:
+            self.report({'WARNING'}, "No frames left to render")
+            return {'CANCELLED'}
+
+        render_queue_state["running"] = True
+        render_queue_state["cancel"] = False
+        render_queue_state["units"] = units
+        render_queue_state["remaining"] = {}
+        for index, frame in units:
+            render_queue_state["remaining"][index] = render_queue_state["remaining"].get(index, 0) + 1
+        render_queue_state["done"] = 0
+        render_queue_state["total"] = len(units)
+        render_queue_state["restore"] = _store_render_state(scene)
+        _begin_render_batch(scene)
+
+        wm = context.window_manager
+        self._timer = wm.event_timer_add(0.1, window=context.window)
+        wm.modal_handler_add(self)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            render_queue_state["cancel"] = True
+
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+
+        scene = context.scene
+        jobs = scene.tmg_cam_vars.render_jobs
+        units = render_queue_state["units"]
+
+        if render_queue_state["cancel"] or not units:
+            return self.finish(context)
+
+        ## One frame per timer tick so the UI can redraw and Esc is picked up
+        index, frame = units.pop(0)
+        render_queue_state["remaining"][index] -= 1
+
+        if index < len(jobs):
+            _render_queue_unit(scene, index, jobs[index], frame)
+            _render_output_collect(jobs)
+            _finish_render_queue_job(jobs, units, index)
+
+        render_queue_state["done"] += 1
+        tag_redraw(context, space_type="VIEW_3D", region_type="UI")
+        return {'RUNNING_MODAL'}
+
+    def finish(self, context):
+        scene = context.scene
+        context.window_manager.event_timer_remove(self._timer)
+
+        _render_output_shutdown()
+
+        for job in scene.tmg_cam_vars.render_jobs:
+            if job.status in {'QUEUED', 'RENDERING'} and render_queue_state["cancel"]:
+                job.status = 'SKIPPED'
+
+        _restore_render_state(scene, render_queue_state["restore"])
+        _end_render_batch()
+        render_queue_state["running"] = False
+        render_queue_state["units"] = []
+        tag_redraw(context, space_type="VIEW_3D", region_type="UI")
+        return {'FINISHED'}
+
+
+class OBJECT_OT_TMG_Cam_Render_Farm_Start(bpy.types.Operator):
+    """Render the queue on local background Blender workers"""
+    bl_idname = 'object.tmg_render_farm_start'
+    bl_label = 'Start Render Farm'
+
+    resume : bpy.props.BoolProperty(name='Resume', default=False, description='Skip frames the job journal lists as finished and whose files exist')
+
+    @classmethod
+    def poll(cls, context):
+        return not render_farm_state["running"] and not render_queue_state["running"] and len(context.scene.tmg_cam_vars.render_jobs) > 0
+
+    def execute(self, context):
+        scene = context.scene
+        tmg_cam_vars = scene.tmg_cam_vars
+        workers = tmg_cam_vars.farm_workers
+        threads = tmg_cam_vars.farm_threads or max(1, (os.cpu_count() or 1) // workers)
+
+        if not _render_farm_start(scene, workers, threads, tmg_cam_vars.farm_chunk, self.resume):
+            self.report({'WARNING'}, "No frames left to render")
+            return {'CANCELLED'}
+
+        return {'FINISHED'}
+
+
+class OBJECT_OT_TMG_Cam_Render_Farm_Stop(bpy.types.Operator):
+    """Stop all render farm workers"""
+    bl_idname = 'object.tmg_render_farm_stop'
+    bl_label = 'Stop Render Farm'
+
+    @classmethod
+    def poll(cls, context):
+        return render_farm_state["running"]
+
+    def execute(self, context):
+        _render_farm_stop()
+        return {'FINISHED'}
+
 
-                props = c1.operator("object.tmg_add_constraint", text='', icon="CON_TRACKTO")
-                props.con = "TRACK_TO"
-                c1.enabled = True
-                
-                c2.enabled = False
-                
-                props = c2.operator("object.tmg_move_constraint", text='', icon="TRIA_UP")
-                props.con = "TRACK_TO"
-                props.dir = "UP"
-                
-                props = c2.operator("object.tmg_move_constraint", text='', icon="TRIA_DOWN")
-                props.con = "TRACK_TO"
-                props.dir = "DOWN"
-                
-                props = c2.operator("object.tmg_remove_constraint", text='', icon="X")
-                props.con = "TRACK_TO"
-   
-   
-class OBJECT_PT_TMG_Cam_Output_Panel(bpy.types.Panel):
-    bl_idname = 'OBJECT_PT_tmg_cam_output_panel'
-    bl_category = 'TMG Camera'
-    bl_label = 'Output'
+class OBJECT_PT_TMG_Cam_Output_Panel_Queue(bpy.types.Panel):
+    bl_idname = "OBJECT_PT_tmg_cam_output_panel_queue"
+    bl_label = "Render Queue"
     bl_space_type = "VIEW_3D"
     bl_region_type = "UI"
-    bl_parent_id = "OBJECT_PT_tmg_cam_parent_panel"
+    bl_parent_id = "OBJECT_PT_tmg_cam_output_panel"
     bl_options = {"DEFAULT_CLOSED"}
 
     def draw(self, context):
-        pass      
-         
-            
-class OBJECT_PT_TMG_Cam_Output_Panel_Image(bpy.types.Panel):
-    bl_idname = "OBJECT_PT_tmg_cam_output_panel_image"
-    bl_label = "Image"
+        scene = context.scene
+        tmg_cam_vars = scene.tmg_cam_vars
+        layout = self.layout
+
+        row = layout.row()
+        row.template_list("OBJECT_UL_TMG_Cam_Render_Jobs", "", tmg_cam_vars, "render_jobs", tmg_cam_vars, "render_jobs_index", rows=4)
+
+        col = row.column(align=True)
+        col.operator_menu_enum("object.tmg_render_queue_add", "mode", text="", icon="ADD")
+        col.operator("object.tmg_render_queue_remove", text="", icon="REMOVE")
+
+        if 0 <= tmg_cam_vars.render_jobs_index < len(tmg_cam_vars.render_jobs):
+            job = tmg_cam_vars.render_jobs[tmg_cam_vars.render_jobs_index]
+
+            col = layout.column()
+            col.use_property_split = True
+            col.use_property_decorate = False
+            col.prop(job, "camera")
+            col.prop(job, "resolution")
+            col.prop(job, "render_path")
+
+            row = col.row(align=True, heading="Animation")
+            row.prop(job, "use_animation", text="")
+            sub = row.row(align=True)
+            sub.active = job.use_animation
+            sub.prop(job, "frame_start", text="")
+            sub.prop(job, "frame_end", text="")
+
+        remaining = render_queue_state["remaining"] if render_queue_state["running"] else None
+        seconds, missing, frames = _render_queue_eta(tmg_cam_vars.render_jobs, remaining)
+        if frames:
+            text = "ETA : %s%s" %("~" if _estimate_is_approximate(scene) else "", _format_seconds(seconds))
+            if missing:
+                text += "  (%s frames not probed)" %missing
+            layout.label(text=text, icon="TIME")
+
+        layout.prop(tmg_cam_vars, "use_batch_grouping")
+
+        row = layout.row(align=True)
+        row.prop(tmg_cam_vars, "use_async_output", text="")
+        sub = row.row(align=True)
+        sub.active = tmg_cam_vars.use_async_output
+        sub.prop(tmg_cam_vars, "output_threads", text="Threads")
+        sub.prop(tmg_cam_vars, "output_memory", text="MB")
+
+        if tmg_cam_vars.use_async_output and not _render_output_supported(scene):
+            layout.label(text="Async output needs compositing and EXR or Standard PNG", icon="INFO")
+
+        row = layout.row(align=True)
+        row.prop(tmg_cam_vars, "use_render_cache", text="")
+        sub = row.row(align=True)
+        sub.active = tmg_cam_vars.use_render_cache
+        sub.prop(tmg_cam_vars, "render_cache_path", text="")
+
+        hits, total = _render_cache_hit_rate()
+        if tmg_cam_vars.use_render_cache and total:
+            layout.label(text="Cache Hits : %s / %s  (%.0f%%)" %(hits, total, hits / total * 100), icon="FILE_CACHE")
+
+        if render_queue_state["running"]:
+            layout.label(text="Rendering %s / %s  (Esc to stop)" %(render_queue_state["done"], render_queue_state["total"]), icon="RENDER_STILL")
+        else:
+            row = layout.row(align=True)
+            row.operator("object.tmg_render_queue_run", text="Render Queue", icon="RENDER_ANIMATION").resume = False
+            row.operator("object.tmg_render_queue_run", text="Resume", icon="RECOVER_LAST").resume = True
+
+
+class OBJECT_PT_TMG_Cam_Output_Panel_Farm(bpy.types.Panel):
+    bl_idname = "OBJECT_PT_tmg_cam_output_panel_farm"
+    bl_label = "Render Farm"
     bl_space_type = "VIEW_3D"
     bl_region_type = "UI"
-    bl_parent_id = "OBJECT_PT_tmg_cam_output_panel"
+    bl_parent_id = "OBJECT_PT_tmg_cam_output_panel_queue"
     bl_options = {"DEFAULT_CLOSED"}
 
     def draw(self, context):
         scene = context.scene
-        # props = scene.eevee
         tmg_cam_vars = scene.tmg_cam_vars
-        
-        if tmg_cam_vars.scene_camera and tmg_cam_vars.scene_camera.type == "CAMERA":
-            layout = self.layout
-            layout.use_property_split = True
-            layout.use_property_decorate = False  # No animation.
+        state = render_farm_state
 
-            layout.prop(tmg_cam_vars, 'render_path', text='')
-            layout.prop(tmg_cam_vars, 'render_filename', text='')
-            
+        layout = self.layout
+        layout.use_property_split = True
+        layout.use_property_decorate = False
+
+        col = layout.column(align=True)
+        col.enabled = not state["running"]
+        col.prop(tmg_cam_vars, "farm_workers", text="Workers")
+        col.prop(tmg_cam_vars, "farm_threads", text="Threads")
+        col.prop(tmg_cam_vars, "farm_chunk", text="Chunk")
+
+        if state["running"]:
+            layout.operator("object.tmg_render_farm_stop", text="Stop", icon="CANCEL")
+        else:
             row = layout.row(align=True)
-            row.operator("render.render", text='Image', icon="CAMERA_DATA")
-            row.operator("render.render", text='Animation', icon="RENDER_ANIMATION").animation=True
-            
-            layout.prop(tmg_cam_vars, 'render_slot', text='Render Slot')
+            row.operator("object.tmg_render_farm_start", text="Start", icon="NETWORK_DRIVE").resume = False
+            row.operator("object.tmg_render_farm_start", text="Resume", icon="RECOVER_LAST").resume = True
 
+        if not state["workers"]:
+            return
 
-class OBJECT_PT_TMG_Cam_Output_Panel_Image_Settings(bpy.types.Panel):
-    bl_idname = "OBJECT_PT_tmg_cam_output_panel_image_settings"
-    bl_label = "Image Settings"
+        box = layout.box()
+        col = box.column(align=True)
+        col.label(text="Frames : %s / %s" %(state["frames_done"], state["frames_total"]))
+        col.label(text="Elapsed : %.1fs" %((time.time() if state["running"] else state["finished"]) - state["started"]))
+
+        for i, worker in enumerate(state["workers"]):
+            if worker["task"]:
+                task = worker["task"]
+                text = "%s : %s %s-%s" %(i + 1, task["camera"], task["frames"][0], task["frames"][-1])
+            else:
+                text = "%s : %s" %(i + 1, "Idle" if worker["alive"] else "Stopped")
+            col.label(text=text, icon="PLAY" if worker["task"] else "PAUSE")
+
+        jobs = tmg_cam_vars.render_jobs
+        for job, frames in state["job_frames"].items():
+            if job < len(jobs) and jobs[job].camera:
+                col.label(text="%s : %s frames, %.1fs avg" %(jobs[job].camera.name, frames, state["job_seconds"][job] / frames))
+
+        if state["failed"]:
+            col.separator()
+            col.label(text="Failed Frames : %s" %len(state["failed"]), icon="ERROR")
+            for job, frame, error in state["failed"][-5:]:
+                col.label(text="%s : %s" %(frame, error))
+
+
+class OBJECT_UL_TMG_Cam_Deliveries(bpy.types.UIList):
+    """Delivery formats"""
+
+    bl_idname = "OBJECT_UL_TMG_Cam_Deliveries"
+
+    def draw_item(self, context, layout, data, item, icon, active_data, active_propname, index):
+        row = layout.row(align=True)
+        row.prop(item, "use", text="")
+        row.prop(item, "name", text="", emboss=False)
+        row.label(text="%s %s%%" %(item.file_format, item.scale))
+
+
+class OBJECT_OT_TMG_Cam_Delivery_Add(bpy.types.Operator):
+    """Add a delivery format"""
+    bl_idname = 'object.tmg_delivery_add'
+    bl_label = 'Add Delivery'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        tmg_cam_vars = context.scene.tmg_cam_vars
+        delivery = tmg_cam_vars.deliveries.add()
+        delivery.name = "review"
+        tmg_cam_vars.deliveries_index = len(tmg_cam_vars.deliveries) - 1
+        return {'FINISHED'}
+
+
+class OBJECT_OT_TMG_Cam_Delivery_Remove(bpy.types.Operator):
+    """Remove the active delivery format"""
+    bl_idname = 'object.tmg_delivery_remove'
+    bl_label = 'Remove Delivery'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    @classmethod
+    def poll(cls, context):
+        return len(context.scene.tmg_cam_vars.deliveries) > 0
+
+    def execute(self, context):
+        tmg_cam_vars = context.scene.tmg_cam_vars
+        tmg_cam_vars.deliveries.remove(tmg_cam_vars.deliveries_index)
+        tmg_cam_vars.deliveries_index = min(tmg_cam_vars.deliveries_index, len(tmg_cam_vars.deliveries) - 1)
+        return {'FINISHED'}
+
+
+class OBJECT_PT_TMG_Cam_Output_Panel_Delivery(bpy.types.Panel):
+    bl_idname = "OBJECT_PT_tmg_cam_output_panel_delivery"
+    bl_label = "Delivery"
     bl_space_type = "VIEW_3D"
     bl_region_type = "UI"
-    bl_parent_id = "OBJECT_PT_tmg_cam_output_panel"
+    bl_parent_id = "OBJECT_PT_tmg_cam_output_panel_queue"
     bl_options = {"DEFAULT_CLOSED"}
 
+    def draw_header(self, context):
+        self.layout.prop(context.scene.tmg_cam_vars, "use_delivery", text="")
+
     def draw(self, context):
         scene = context.scene
-        props = scene.eevee
         tmg_cam_vars = scene.tmg_cam_vars
-        
-        if tmg_cam_vars.scene_camera and tmg_cam_vars.scene_camera.type == "CAMERA":
-            layout = self.layout
-            layout.use_property_split = True
-            layout.use_property_decorate = False  # No animation.
+        state = transcode_state
+
+        layout = self.layout
+        layout.active = tmg_cam_vars.use_delivery
+
+        row = layout.row()
+        row.template_list("OBJECT_UL_TMG_Cam_Deliveries", "", tmg_cam_vars, "deliveries", tmg_cam_vars, "deliveries_index", rows=3)
+
+        col = row.column(align=True)
+        col.operator("object.tmg_delivery_add", text="", icon="ADD")
+        col.operator("object.tmg_delivery_remove", text="", icon="REMOVE")
+
+        col = layout.column()
+        col.use_property_split = True
+        col.use_property_decorate = False
+
+        if 0 <= tmg_cam_vars.deliveries_index < len(tmg_cam_vars.deliveries):
+            delivery = tmg_cam_vars.deliveries[tmg_cam_vars.deliveries_index]
+            col.prop(delivery, "file_format")
+            if delivery.file_format in {'PNG', 'TIFF'}:
+                col.prop(delivery, "color_depth", expand=True)
+            if delivery.file_format in {'JPEG', 'WEBP'}:
+                col.prop(delivery, "quality")
+            col.prop(delivery, "view_transform")
+            col.prop(delivery, "look")
+            col.prop(delivery, "scale")
+
+        col.prop(tmg_cam_vars, "delivery_workers")
+
+        if state["workers"] or state["done"] or state["failed"]:
+            box = layout.box()
+            box.label(text="Converted : %s  Waiting : %s" %(state["done"], len(state["tasks"]) + sum(1 for worker in state["workers"] if worker["task"])))
+            for filepath, error in state["failed"][-3:]:
+                box.label(text="%s : %s" %(os.path.basename(filepath), error), icon="ERROR")
+
+
+## Passes the analyzer knows about, (owner, property, Render Layers sockets, channels)
+render_pass_props = (
+    ("view_layer", "use_pass_z", ("Depth",), 1),
+    ("view_layer", "use_pass_mist", ("Mist",), 1),
+    ("view_layer", "use_pass_position", ("Position",), 3),
+    ("view_layer", "use_pass_normal", ("Normal",), 3),
+    ("view_layer", "use_pass_vector", ("Vector",), 4),
+    ("view_layer", "use_pass_uv", ("UV",), 3),
+    ("view_layer", "use_pass_object_index", ("IndexOB",), 1),
+    ("view_layer", "use_pass_material_index", ("IndexMA",), 1),
+    ("view_layer", "use_pass_diffuse_direct", ("DiffDir",), 3),
+    ("view_layer", "use_pass_diffuse_indirect", ("DiffInd",), 3),
+    ("view_layer", "use_pass_diffuse_color", ("DiffCol",), 3),
+    ("view_layer", "use_pass_glossy_direct", ("GlossDir",), 3),
+    ("view_layer", "use_pass_glossy_indirect", ("GlossInd",), 3),
+    ("view_layer", "use_pass_glossy_color", ("GlossCol",), 3),
+    ("view_layer", "use_pass_transmission_direct", ("TransDir",), 3),
+    ("view_layer", "use_pass_transmission_indirect", ("TransInd",), 3),
+    ("view_layer", "use_pass_transmission_color", ("TransCol",), 3),
+    ("view_layer", "use_pass_emit", ("Emit",), 3),
+    ("view_layer", "use_pass_environment", ("Env",), 3),
+    ("view_layer", "use_pass_shadow", ("Shadow",), 3),
+    ("view_layer", "use_pass_ambient_occlusion", ("AO",), 3),
+    ("cycles", "use_pass_volume_direct", ("VolumeDir",), 3),
+    ("cycles", "use_pass_volume_indirect", ("VolumeInd",), 3),
+    ("cycles", "use_pass_shadow_catcher", ("Shadow Catcher",), 3),
+    ("cycles", "denoising_store_passes", ("Denoising Normal", "Denoising Albedo", "Denoising Depth"), 7),
+    ("eevee", "use_pass_bloom", ("BloomCol",), 3),
+    ("eevee", "use_pass_volume_direct", ("VolumeDir",), 3),
+)
+
+render_pass_cryptomatte = (
+    ("use_pass_cryptomatte_object", "CryptoObject"),
+    ("use_pass_cryptomatte_material", "CryptoMaterial"),
+    ("use_pass_cryptomatte_asset", "CryptoAsset"),
+)
 
-            rd = context.scene.render
-            image_settings = rd.image_settings
 
-            layout.prop(scene, 'use_nodes')
+def _pass_owner(view_layer, owner):
+    if owner == "view_layer":
+        return view_layer
+    return getattr(view_layer, owner, None)
+
+
+def _enabled_render_passes(view_layer):
+    ## (label, owner, property, sockets, channels) for every enabled pass
+    passes = []
+
+    for owner, prop, sockets, channels in render_pass_props:
+        data = _pass_owner(view_layer, owner)
+
+        if data is not None and getattr(data, prop, False):
+            passes.append((sockets[0], owner, prop, sockets, channels))
+
+    ## Two ranks per RGBA socket
+    levels = (view_layer.pass_cryptomatte_depth + 1) // 2
+    for prop, prefix in render_pass_cryptomatte:
+        if getattr(view_layer, prop, False):
+            sockets = tuple("%s%02d" %(prefix, i) for i in range(levels))
+            passes.append((prefix, "view_layer", prop, sockets, 4 * levels))
+
+    for aov in view_layer.aovs:
+        passes.append((aov.name, "aov", aov.name, (aov.name,), 1 if aov.type == 'VALUE' else 4))
+
+    return passes
+
+
+def _live_compositor_nodes(tree):
+    ## Nodes that feed a Composite, Viewer or File Output, walked backwards
+    live = set()
+    stack = [node for node in tree.nodes if node.type in {'COMPOSITE', 'VIEWER', 'OUTPUT_FILE'} and not node.mute]
+    incoming = {}
+
+    for link in tree.links:
+        if link.is_valid and not link.is_muted:
+            incoming.setdefault(link.to_node.name, []).append(link.from_node)
+
+    while stack:
+        node = stack.pop()
+
+        if node.name in live:
+            continue
+
+        live.add(node.name)
+        stack.extend(incoming.get(node.name, ()))
+
+    return live
+
+
+def _consumed_pass_sockets(scene, view_layer):
+    consumed = set()
+
+    if not scene.use_nodes or scene.node_tree is None:
+        return consumed
+
+    tree = scene.node_tree
+    live = _live_compositor_nodes(tree)
+
+    for node in tree.nodes:
+        if node.type != 'R_LAYERS' or node.layer != view_layer.name:
+            continue
+
+        if node.scene is not None and node.scene != scene:
+            continue
+
+        for output in node.outputs:
+            if any(link.to_node.name in live for link in output.links if link.is_valid and not link.is_muted):
+                consumed.add(output.name)
 
-            layout = layout.column(heading="Saving")
-            layout.prop(rd, "use_file_extension")
-            layout.prop(rd, "use_render_cache")
+    return consumed
 
-            layout.prop(scene.render.image_settings, 'file_format')
-            layout.prop(scene.render.image_settings, 'color_mode')
 
-            if not rd.is_movie_format:
-                layout = layout.column(heading="Image Sequence")
-                layout.prop(rd, "use_overwrite")
-                layout.prop(rd, "use_placeholder")          
+def _unused_render_passes(scene, view_layer):
+    ## [(label, owner, property, memory bytes, disk bytes)], None when the
+    ## whole render result is written to a multilayer EXR
+    rd = scene.render
+    settings = rd.image_settings
+    multilayer = settings.file_format == 'OPEN_EXR_MULTILAYER'
+
+    if multilayer and scene.tmg_cam_vars.prune_keep_multilayer:
+        return None
+
+    scale = rd.resolution_percentage / 100
+    pixels = int(rd.resolution_x * scale) * int(rd.resolution_y * scale)
+    consumed = _consumed_pass_sockets(scene, view_layer)
+    unused = []
+
+    for label, owner, prop, sockets, channels in _enabled_render_passes(view_layer):
+        if any(socket in consumed for socket in sockets):
+            continue
+
+        memory = pixels * channels * 4
+        disk = pixels * channels * (2 if settings.color_depth == '16' else 4) if multilayer else 0
+        unused.append((label, owner, prop, memory, disk))
+
+    return unused
+
+
+def _format_bytes(size):
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return "%.0f %s" %(size, unit)
+        size /= 1024
+    return "%.1f GB" %size
+
+
+## Pre-render memory estimate. Framebuffers are cheap to work out and are
+## computed on draw, scene data walks every mesh and image so it is cached
+## until refreshed
+render_memory_state = {
+    "scene" : None,
+    "meshes" : 0,
+    "textures" : 0,
+    "unloaded" : 0,
+}
+
+
+def _render_view_count(scene):
+    rd = scene.render
+
+    if not rd.use_multiview:
+        return 1
+    if rd.views_format == 'STEREO_3D':
+        return 2
+    return max(1, sum(1 for view in rd.views if view.use))
+
+
+def _framebuffer_bytes(scene):
+    rd = scene.render
+    scale = rd.resolution_percentage / 100
+    res_x = int(rd.resolution_x * scale)
+    res_y = int(rd.resolution_y * scale)
+
+    if rd.engine in {"BLENDER_EEVEE", "BLENDER_EEVEE_NEXT"} and scene.eevee.use_overscan:
+        ## overscan_size is a percentage of the frame on each side
+        overscan = 1 + scene.eevee.overscan_size / 100 * 2
+        res_x, res_y = int(res_x * overscan), int(res_y * overscan)
+
+    pixels = res_x * res_y
+    channels = 0
+
+    for view_layer in scene.view_layers:
+        if not view_layer.use:
+            continue
+
+        ## Combined RGBA plus every enabled pass
+        channels += 4 + sum(item[4] for item in _enabled_render_passes(view_layer))
+
+    ## Float32 channels, held once by the renderer and once in the render result
+    return pixels * channels * 4 * 2 * _render_view_count(scene)
+
+
+def _scene_data_bytes():
+    meshes = 0
+    textures = 0
+    unloaded = 0
+
+    for mesh in bpy.data.meshes:
+        if not mesh.users:
+            continue
+
+        ## Positions / normals, corners, faces, plus triangles and BVH nodes
+        triangles = len(mesh.loops) - 2 * len(mesh.polygons)
+        meshes += len(mesh.vertices) * 32 + len(mesh.loops) * 16 + len(mesh.polygons) * 16 + triangles * 80
+
+    for image in bpy.data.images:
+        if not image.users or image.type not in {'IMAGE', 'MULTILAYER'}:
+            continue
+
+        ## Reading size would load the image from disk, only count it
+        if not image.has_data:
+            unloaded += 1
+            continue
+
+        width, height = image.size
+        textures += width * height * max(1, image.channels) * (4 if image.is_float else 1)
+
+    return meshes, textures, unloaded
+
+
+def _refresh_scene_memory(scene):
+    meshes, textures, unloaded = _scene_data_bytes()
+    render_memory_state["scene"] = scene.name
+    render_memory_state["meshes"] = meshes
+    render_memory_state["textures"] = textures
+    render_memory_state["unloaded"] = unloaded
+
+
+def _draw_memory_estimate(layout, context):
+    scene = context.scene
+    tmg_cam_vars = scene.tmg_cam_vars
+    state = render_memory_state
+
+    framebuffer = _framebuffer_bytes(scene)
+    total = framebuffer
+
+    box = layout.box()
+    col = box.column(align=True)
+
+    row = col.row(align=True)
+    row.label(text="Framebuffers : %s" %_format_bytes(framebuffer), icon="MEMORY")
+    row.operator("object.tmg_estimate_memory", text="", icon="FILE_REFRESH")
+
+    if state["scene"] == scene.name:
+        col.label(text="Meshes : %s  Textures : %s" %(_format_bytes(state["meshes"]), _format_bytes(state["textures"])))
+        total += state["meshes"] + state["textures"]
+
+        if state["unloaded"]:
+            col.label(text="%s images not loaded yet, not counted" %state["unloaded"], icon="INFO")
+
+    col.label(text="Total : %s / %s GB" %(_format_bytes(total), tmg_cam_vars.memory_budget))
+    col.prop(tmg_cam_vars, "memory_budget")
+
+    if total > tmg_cam_vars.memory_budget * 1024 ** 3:
+        col.label(text="Over the node memory budget", icon="ERROR")
+
+
+class OBJECT_OT_TMG_Cam_Estimate_Memory(bpy.types.Operator):
+    """Add up mesh and texture memory for the render memory estimate"""
+    bl_idname = 'object.tmg_estimate_memory'
+    bl_label = 'Estimate Scene Memory'
+
+    def execute(self, context):
+        _refresh_scene_memory(context.scene)
+        return {'FINISHED'}
+
 
-            
 class OBJECT_PT_TMG_Cam_Passes_Panel(bpy.types.Panel):
     bl_idname = 'OBJECT_PT_tmg_cam_passes_panel'
     bl_category = 'TMG Camera'
@@ -2074,8 +5793,74 @@ class OBJECT_PT_TMG_Cam_Passes_Panel_Shader_AOV(bpy.types.Panel):
                 if aov and not aov.is_valid:
                     layout.label(
                         text="Conflicts with another render pass with the same name", icon='ERROR')
-    
-            
+
+
+class OBJECT_OT_TMG_Cam_Prune_Passes(bpy.types.Operator):
+    """Disable enabled passes that nothing in the compositor or output uses"""
+    bl_idname = 'object.tmg_prune_passes'
+    bl_label = 'Disable Unused Passes'
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        scene = context.scene
+        view_layer = context.view_layer
+        unused = _unused_render_passes(scene, view_layer)
+        count = 0
+
+        for label, owner, prop, memory, disk in unused or ():
+            ## AOVs are named outputs rather than toggles, those are left to the user
+            if owner == "aov":
+                continue
+
+            setattr(_pass_owner(view_layer, owner), prop, False)
+            count += 1
+
+        self.report({'INFO'}, "Disabled %s passes" %count)
+        return {'FINISHED'}
+
+
+class OBJECT_PT_TMG_Cam_Passes_Panel_Unused(bpy.types.Panel):
+    bl_idname = "OBJECT_PT_tmg_cam_passes_panel_unused"
+    bl_label = "Unused Passes"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_parent_id = "OBJECT_PT_tmg_cam_passes_panel"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        scene = context.scene
+        tmg_cam_vars = scene.tmg_cam_vars
+        layout = self.layout
+
+        layout.prop(tmg_cam_vars, "prune_keep_multilayer")
+
+        unused = _unused_render_passes(scene, context.view_layer)
+
+        if unused is None:
+            layout.label(text="Every pass is written to the multilayer EXR", icon="INFO")
+            return
+
+        if not unused:
+            layout.label(text="Every enabled pass is used", icon="CHECKMARK")
+            return
+
+        col = layout.column(align=True)
+        for label, owner, prop, memory, disk in unused:
+            row = col.row()
+            row.label(text=label, icon="RENDERLAYERS" if owner != "aov" else "SHADING_RENDERED")
+            row.label(text=_format_bytes(memory))
+
+        memory = sum(item[3] for item in unused)
+        disk = sum(item[4] for item in unused)
+
+        box = layout.box()
+        box.label(text="Memory per frame : %s" %_format_bytes(memory))
+        if disk:
+            box.label(text="Disk per frame : up to %s" %_format_bytes(disk))
+
+        layout.operator("object.tmg_prune_passes", text="Disable Unused", icon="TRASH")
+
+
 class OBJECT_PT_TMG_Cam_Render_Panel(bpy.types.Panel):
     bl_idname = 'OBJECT_PT_tmg_cam_render_panel'
     bl_category = 'TMG Camera'
@@ -2320,6 +6105,7 @@ class OBJECT_PT_TMG_Cam_Render_Panel_Performance_Final_Render(bpy.types.Panel):
 
             # col.prop(rd, "use_save_buffers")
             col.prop(rd, "use_persistent_data", text="Persistent Data")
+            col.prop(tmg_cam_vars, "use_batch_grouping", text="Group Batch Renders")
             
             if rd.engine == "CYCLES":
                 layout.active = True
@@ -2378,6 +6164,8 @@ class OBJECT_PT_TMG_Cam_Render_Panel_Performance_Tiles(bpy.types.Panel):
             sub = col.column()
             sub.active = cscene.use_auto_tile
             sub.prop(cscene, "tile_size")
+
+            _draw_performance_tune(layout, tmg_cam_vars.scene_camera)
             
             if rd.engine == "CYCLES":
                 layout.active = True
@@ -2433,6 +6221,8 @@ class OBJECT_PT_TMG_Cam_Render_Panel_Performance_Threads(bpy.types.Panel):
             sub = layout.column(align=True)
             sub.enabled = rd.threads_mode == 'FIXED'
             sub.prop(rd, "threads")
+
+            _draw_performance_tune(layout, tmg_cam_vars.scene_camera)
             
             if rd.engine == "CYCLES":
                 layout.active = True
@@ -2488,6 +6278,11 @@ class OBJECT_PT_TMG_Cam_Render_Panel_Performance_Viewport(bpy.types.Panel):
             col = layout.column()
             col.prop(rd, "preview_pixel_size", text="Pixel Size")
             # col.prop(cscene, "preview_start_resolution", text="Start Pixels")
+
+            ## Writes saved by only applying changed values on camera switch
+            col = layout.column(align=True)
+            col.label(text="Camera Switch Writes : %s" %camera_state_stats["written"])
+            col.label(text="Skipped Writes : %s" %camera_state_stats["skipped"])
             
             if rd.engine == "CYCLES":
                 layout.active = True
@@ -2548,6 +6343,9 @@ class OBJECT_PT_TMG_Cam_Render_Panel_Resolution(bpy.types.Panel):
                 preset.active = False
 
             layout.prop(scene.render, 'resolution_percentage', text="%")
+
+            _draw_render_estimate(layout, context)
+            _draw_memory_estimate(layout, context)
             
             
 class OBJECT_PT_TMG_Cam_Render_Panel_Sampling(bpy.types.Panel):
@@ -2824,6 +6622,8 @@ class OBJECT_PT_TMG_Cam_Render_Panel_Sampling_Samples(bpy.types.Panel):
             layout.prop(props, "taa_samples", text="Viewport")
             layout.prop(props, "use_taa_reprojection")
 
+            _draw_render_estimate(layout, context)
+
 
 class OBJECT_PT_TMG_Cam_Render_Panel_Cycles_Sampling_Samples(bpy.types.Panel):
     bl_idname = "OBJECT_PT_tmg_cam_render_panel_cycles_sampling_samples"
@@ -2892,6 +6692,18 @@ class OBJECT_PT_TMG_Cam_Render_Panel_Cycles_Sampling_Samples_Render(bpy.types.Pa
                 col.prop(cscene, "samples", text="Samples")
             col.prop(cscene, "time_limit")
 
+            _draw_render_estimate(layout, context)
+
+            col = layout.column(align=True)
+            col.prop(tmg_cam_vars, "tune_noise_target")
+            col.prop(tmg_cam_vars, "tune_max_samples")
+
+            row = layout.row(align=True)
+            row.operator("object.tmg_tune_sampling", text="Auto Tune", icon="MOD_NOISE")
+
+            if camera.tmg_cam_settings.tuned:
+                row.label(text="%s samples, noise %.4f" %(camera.tmg_cam_settings.tune_samples, camera.tmg_cam_settings.tune_noise))
+
 
 class OBJECT_PT_TMG_Cam_Render_Panel_Cycles_Sampling_Samples_Viewport(bpy.types.Panel):
     bl_idname = "OBJECT_PT_tmg_cam_render_panel_cycles_sampling_samples_viewport"
@@ -2936,7 +6748,67 @@ class OBJECT_PT_TMG_Cam_Render_Panel_Cycles_Sampling_Samples_Viewport(bpy.types.
             else:
                 layout.prop(cscene, "preview_samples", text="Samples")
 
-          
+
+class OBJECT_OT_TMG_Cam_Render_Stats_Clear(bpy.types.Operator):
+    """Delete the recorded render statistics"""
+    bl_idname = 'object.tmg_render_stats_clear'
+    bl_label = 'Clear Render Statistics'
+
+    def execute(self, context):
+        try:
+            os.remove(_render_stats_path())
+        except OSError:
+            pass
+
+        render_stats_state["cache"] = None
+        render_stats_state["mtime"] = None
+        return {'FINISHED'}
+
+
+class OBJECT_PT_TMG_Cam_Render_Panel_Stats(bpy.types.Panel):
+    bl_idname = "OBJECT_PT_tmg_cam_render_panel_stats"
+    bl_label = "Statistics"
+    bl_space_type = "VIEW_3D"
+    bl_region_type = "UI"
+    bl_parent_id = "OBJECT_PT_tmg_cam_render_panel"
+    bl_options = {"DEFAULT_CLOSED"}
+
+    def draw(self, context):
+        scene = context.scene
+        tmg_cam_vars = scene.tmg_cam_vars
+        layout = self.layout
+
+        layout.prop(tmg_cam_vars, "stats_window")
+
+        savings = _render_batch_sync_savings()
+        if savings:
+            count, sync, full = savings
+            layout.label(text="Last batch : %s renders, sync %s (about %s without reuse)" %(count, _format_seconds(sync), _format_seconds(full)), icon="MOD_TIME")
+
+        summary = _render_stats_summary(tmg_cam_vars.stats_window)
+
+        if not summary:
+            layout.label(text="No renders recorded", icon="INFO")
+            return
+
+        ## Slowest cameras first
+        col = layout.column(align=True)
+        row = col.row()
+        row.label(text="Camera")
+        row.label(text="Avg")
+        row.label(text="Sync")
+        row.label(text="Peak")
+
+        for camera, stats in sorted(summary.items(), key=lambda item: item[1]["wall"], reverse=True):
+            row = col.box().row()
+            row.label(text="%s (%s)" %(camera, stats["count"]), icon="CAMERA_DATA")
+            row.label(text=_format_seconds(stats["wall"]))
+            row.label(text="n/a" if stats["sync_share"] is None else "%.0f%%" %(stats["sync_share"] * 100))
+            row.label(text="n/a" if stats["peak_mem"] is None else "%.0fM" %stats["peak_mem"])
+
+        layout.operator("object.tmg_render_stats_clear", text="Clear", icon="TRASH")
+
+
 class OBJECT_PT_TMG_Cam_Render_Panel_Timeline(bpy.types.Panel):
     bl_idname = "OBJECT_PT_tmg_cam_render_panel_timeline"
     bl_label = "Timeline"
@@ -3600,6 +7472,8 @@ class OBJECT_PT_TMG_Cam_Scene_Effects_Panel_Stereoscopy(bpy.types.Panel):
                 row.use_property_decorate = False
                 row.prop(rv, "camera_suffix")
 
+            layout.operator("object.tmg_render_multiview", text="Render Selected Cameras", icon="OUTLINER_OB_CAMERA")
+
 
 class OBJECT_PT_TMG_Cam_Scene_Effects_Panel_Subsurface_Scattering(bpy.types.Panel):
     bl_idname = "OBJECT_PT_tmg_scene_sffects_panel_subsurface_scattering"
@@ -0,0 +1,99 @@
+# Delivery transcode worker, started by the TMG Camera Tools render queue
+#
+#   blender -b --factory-startup --python TMG_Camera_Transcode_Worker.py
+#
+# Reads one JSON task per line from stdin, loads the master EXR once and saves
+# every delivery variant of it. Lines meant for the add-on are prefixed with
+# "TMG_TRANSCODE ".
+
+import bpy, sys, os, json, time
+
+
+def send(**event):
+    print("TMG_TRANSCODE " + json.dumps(event), flush=True)
+
+
+def save_variant(scene, image, width, height, variant):
+    settings = scene.render.image_settings
+    settings.file_format = variant["file_format"]
+    settings.color_mode = 'RGBA' if variant["file_format"] in {'PNG', 'TIFF', 'WEBP'} else 'RGB'
+
+    if variant["file_format"] in {'PNG', 'TIFF'}:
+        settings.color_depth = variant["color_depth"]
+
+    settings.quality = variant["quality"]
+    scene.view_settings.view_transform = variant["view_transform"]
+    scene.view_settings.look = variant["look"]
+
+    scale = variant["scale"] / 100
+    if scale == 1.0:
+        os.makedirs(os.path.dirname(variant["filepath"]), exist_ok=True)
+        image.save_render(variant["filepath"], scene=scene)
+        return
+
+    ## Back to the full size master even when saving failed, the next
+    ## variants scale from it
+    try:
+        image.scale(max(1, int(width * scale)), max(1, int(height * scale)))
+        os.makedirs(os.path.dirname(variant["filepath"]), exist_ok=True)
+        image.save_render(variant["filepath"], scene=scene)
+    finally:
+        image.reload()
+
+
+def transcode(task):
+    scene = bpy.context.scene
+    start = time.time()
+
+    try:
+        image = bpy.data.images.load(task["source"], check_existing=False)
+    except RuntimeError as error:
+        ## Missing or half written master, the add-on still needs "done" to
+        ## hand this worker its next task
+        send(event="failed", source=task["source"], error=str(error))
+        send(event="done", source=task["source"], written=[], seconds=time.time() - start)
+        return
+
+    width, height = image.size
+    written = []
+
+    for variant in task["variants"]:
+        try:
+            save_variant(scene, image, width, height, variant)
+            written.append(variant["filepath"])
+        except Exception as error:
+            ## Unknown view transforms / looks raise TypeError, one bad
+            ## variant must not take the worker down
+            send(event="failed", source=task["source"], filepath=variant["filepath"], error=str(error))
+
+    bpy.data.images.remove(image)
+    send(event="done", source=task["source"], written=written, seconds=time.time() - start)
+
+
+def main():
+    send(event="ready")
+
+    for line in sys.stdin:
+        line = line.strip()
+
+        if not line:
+            continue
+
+        if line == "quit":
+            break
+
+        try:
+            task = json.loads(line)
+        except ValueError as error:
+            send(event="failed", source="", error=str(error))
+            continue
+
+        try:
+            transcode(task)
+        except Exception as error:
+            send(event="failed", source=task.get("source", ""), error=str(error))
+            send(event="done", source=task.get("source", ""), written=[], seconds=0.0)
+
+
+if __name__ == "__main__":
+    main()
@@ -36,6 +36,10 @@ bl_info = {
 
 classes = (
     ## Properties
+    TMG_Cam_Camera_Settings,
+    TMG_Cam_List_Item,
+    TMG_Cam_Render_Job,
+    TMG_Cam_Delivery,
     TMG_Cam_Properties,
 
     ## Camera Operators
@@ -46,6 +50,7 @@ classes = (
     ## Camera Panel
     OBJECT_PT_TMG_Cam_Parent_Panel, 
     OBJECT_PT_TMG_Cam_Panel, 
+    OBJECT_UL_TMG_Cam_List,
     OBJECT_PT_TMG_Cam_Panel_List,
     OBJECT_PT_TMG_Cam_Panel_Name, 
     OBJECT_PT_TMG_Cam_Panel_Perspective, 
@@ -61,6 +66,11 @@ classes = (
     OBJECT_PT_TMG_Cam_Output_Panel,
     OBJECT_PT_TMG_Cam_Output_Panel_Image, 
     OBJECT_PT_TMG_Cam_Output_Panel_Image_Settings,
+    OBJECT_UL_TMG_Cam_Render_Jobs,
+    OBJECT_PT_TMG_Cam_Output_Panel_Queue,
+    OBJECT_PT_TMG_Cam_Output_Panel_Farm,
+    OBJECT_UL_TMG_Cam_Deliveries,
+    OBJECT_PT_TMG_Cam_Output_Panel_Delivery,
     
     ## Passes Panel
     OBJECT_PT_TMG_Cam_Passes_Panel, 
@@ -69,7 +79,8 @@ classes = (
     OBJECT_PT_TMG_Cam_Passes_Panel_Effects, 
     OBJECT_PT_TMG_Cam_Passes_Panel_Filter,
     OBJECT_PT_TMG_Cam_Passes_Panel_Light, 
-    OBJECT_PT_TMG_Cam_Passes_Panel_Shader_AOV, 
+    OBJECT_PT_TMG_Cam_Passes_Panel_Shader_AOV,
+    OBJECT_PT_TMG_Cam_Passes_Panel_Unused,
     
     ## Render Panel
     OBJECT_PT_TMG_Cam_Render_Panel,
@@ -94,6 +105,7 @@ classes = (
     OBJECT_PT_TMG_Cam_Render_Panel_Cycles_Sampling_Samples, 
     OBJECT_PT_TMG_Cam_Render_Panel_Cycles_Sampling_Samples_Render,
     OBJECT_PT_TMG_Cam_Render_Panel_Cycles_Sampling_Samples_Viewport,
+    OBJECT_PT_TMG_Cam_Render_Panel_Stats,
     OBJECT_PT_TMG_Cam_Render_Panel_Timeline, 
     
     ## Scene Effects Panel
@@ -146,18 +158,74 @@ classes = (
     OBJECT_OT_TMG_Cam_Add_Constraint, 
     OBJECT_OT_TMG_Cam_Move_Constraint, 
     OBJECT_OT_TMG_Cam_Randomize_Selected_Light,
+    OBJECT_OT_TMG_Cam_Render_Queue_Add,
+    OBJECT_OT_TMG_Cam_Render_Queue_Remove,
+    OBJECT_OT_TMG_Cam_Render_Queue_Run,
+    OBJECT_OT_TMG_Cam_Render_Farm_Start,
+    OBJECT_OT_TMG_Cam_Render_Farm_Stop,
+    OBJECT_OT_TMG_Cam_Render_Probe,
+    OBJECT_OT_TMG_Cam_Tune_Sampling,
+    OBJECT_OT_TMG_Cam_Optimize_Performance,
+    OBJECT_OT_TMG_Cam_Render_Border,
+    OBJECT_OT_TMG_Cam_Render_Preview,
+    OBJECT_OT_TMG_Cam_Render_Multiview,
+    OBJECT_OT_TMG_Cam_Tag_File_Output,
+    OBJECT_OT_TMG_Cam_Delivery_Add,
+    OBJECT_OT_TMG_Cam_Delivery_Remove,
+    OBJECT_OT_TMG_Cam_Prune_Passes,
+    OBJECT_OT_TMG_Cam_Estimate_Memory,
+    OBJECT_OT_TMG_Cam_Render_Stats_Clear,
     OBJECT_OT_TMG_Cam_Remove_Constraint,
     OBJECT_OT_TMG_Cam_Select_Camera,
     # OBJECT_OT_TMG_Cam_Select_Object,
 )
 
+handlers = (
+    ## Camera Index
+    ("depsgraph_update_post", tmg_cam_depsgraph_update),
+    ("load_post", tmg_cam_load_post),
+    ("undo_post", tmg_cam_load_post),
+    ("redo_post", tmg_cam_load_post),
+
+    ## Camera Settings
+    ("load_post", tmg_cam_migrate_settings),
+
+    ## Render Statistics
+    ("render_pre", tmg_cam_render_stats_pre),
+    ("render_stats", tmg_cam_render_stats),
+    ("render_post", tmg_cam_render_stats_post),
+    ("render_cancel", tmg_cam_render_stats_cancel),
+
+    ## Async Output
+    ("render_cancel", tmg_cam_render_output_cancel),
+
+    ## Shutdown
+    ("load_pre", tmg_cam_shutdown),
+)
+
 def register():
     for rsclass in classes:
         bpy.utils.register_class(rsclass)
-        bpy.types.Scene.tmg_cam_vars = bpy.props.PointerProperty(type=TMG_Cam_Properties)
+
+    bpy.types.Scene.tmg_cam_vars = bpy.props.PointerProperty(type=TMG_Cam_Properties)
+    bpy.types.Object.tmg_cam_settings = bpy.props.PointerProperty(type=TMG_Cam_Camera_Settings)
+    bpy.types.Node.tmg_cam_camera = bpy.props.PointerProperty(name='Camera', type=bpy.types.Object, description='Camera this File Output node writes for, muted while other cameras render')
+
+    for handler_type, handler in handlers:
+        getattr(bpy.app.handlers, handler_type).append(handler)
 
 def unregister():
-    for rsclass in classes:
+    tmg_cam_shutdown()
+
+    for handler_type, handler in handlers:
+        if handler in getattr(bpy.app.handlers, handler_type):
+            getattr(bpy.app.handlers, handler_type).remove(handler)
+
+    del bpy.types.Node.tmg_cam_camera
+    del bpy.types.Object.tmg_cam_settings
+    del bpy.types.Scene.tmg_cam_vars
+
+    for rsclass in reversed(classes):
         bpy.utils.unregister_class(rsclass)
 
 if __name__ == "__main__":
@@ -0,0 +1,59 @@
+# Camera list redraw cost vs. number of non-camera objects
+#
+# Run with:
+#   blender -b --factory-startup --python benchmarks/bench_camera_index.py
+#
+# Compares the old full scan of scene.objects with the add-on's camera index.
+# The index lookup should stay flat as the object count grows.
+
+import bpy, sys, os, importlib.util
+from timeit import timeit
+
+
+def load_addon():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    spec = importlib.util.spec_from_file_location("tmg_cam_tools", os.path.join(root, "__init__.py"), submodule_search_locations=[root])
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules["tmg_cam_tools"] = addon
+    spec.loader.exec_module(addon)
+    addon.register()
+    return sys.modules["tmg_cam_tools.TMG_Camera_Panel"]
+
+
+def full_scan(scene):
+    objs = []
+    for ob in scene.objects:
+        if ob.type == "CAMERA":
+            objs.append(ob)
+    return objs
+
+
+def main():
+    panel = load_addon()
+    scene = bpy.context.scene
+    collection = scene.collection
+
+    for i in range(20):
+        cam = bpy.data.objects.new("Bench_Cam_%s" % i, bpy.data.cameras.new("Bench_Cam_%s" % i))
+        collection.objects.link(cam)
+
+    print("%10s %14s %14s" % ("objects", "scan (ms)", "index (ms)"))
+
+    total = 0
+    for count in (1000, 10000, 100000, 200000):
+        for i in range(total, count):
+            collection.objects.link(bpy.data.objects.new("Bench_Empty_%s" % i, None))
+        total = count
+
+        panel._invalidate_camera_index()
+        panel._get_scene_cameras(scene)
+
+        runs = 20
+        scan = timeit(lambda: full_scan(scene), number=runs) / runs * 1000
+        index = timeit(lambda: panel._get_scene_cameras(scene), number=runs) / runs * 1000
+
+        print("%10s %14.3f %14.3f" % (count, scan, index))
+
+
+if __name__ == "__main__":
+    main()
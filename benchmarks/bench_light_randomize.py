@@ -0,0 +1,108 @@
+# Light randomizer cost vs. number of selected lights
+#
+# Run with:
+#   blender -b --factory-startup --python benchmarks/bench_light_randomize.py
+#
+# Compares the old per light uniform() / RNA write loop with the add-on's
+# batched numpy + foreach_set randomizer, first with the value toggles only
+# and then with the light type randomized as well, which changes the sizes
+# each light has.
+
+import bpy, sys, os, importlib.util
+from random import uniform, randint
+from timeit import timeit
+
+
+def load_addon():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    spec = importlib.util.spec_from_file_location("tmg_cam_tools", os.path.join(root, "__init__.py"), submodule_search_locations=[root])
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules["tmg_cam_tools"] = addon
+    spec.loader.exec_module(addon)
+    addon.register()
+    return sys.modules["tmg_cam_tools.TMG_Camera_Panel"]
+
+
+def per_light(tmg_cam_vars, lights):
+    for light in lights:
+        light.color.r = uniform(tmg_cam_vars.light_random_color_r_min, tmg_cam_vars.light_random_color_r_max)
+        light.color.g = uniform(tmg_cam_vars.light_random_color_g_min, tmg_cam_vars.light_random_color_g_max)
+        light.color.b = uniform(tmg_cam_vars.light_random_color_b_min, tmg_cam_vars.light_random_color_b_max)
+        light.energy = uniform(tmg_cam_vars.light_random_energy_min, tmg_cam_vars.light_random_energy_max)
+        light.diffuse_factor = uniform(tmg_cam_vars.light_random_diffuse_min, tmg_cam_vars.light_random_diffuse_max)
+        light.specular_factor = uniform(tmg_cam_vars.light_random_specular_min, tmg_cam_vars.light_random_specular_max)
+        light.volume_factor = uniform(tmg_cam_vars.light_random_volume_min, tmg_cam_vars.light_random_volume_max)
+        light.shadow_soft_size = uniform(tmg_cam_vars.light_random_size_min, tmg_cam_vars.light_random_size_max)
+
+
+def per_light_type(tmg_cam_vars, lights):
+    light_types = ("POINT", "SPOT", "AREA")
+
+    for light in lights:
+        light.type = light_types[randint(0, len(light_types) - 1)]
+        light = bpy.data.lights[light.name_full]
+
+        if light.type == "AREA":
+            light.size = uniform(tmg_cam_vars.light_random_size_min, tmg_cam_vars.light_random_size_max)
+        else:
+            light.shadow_soft_size = uniform(tmg_cam_vars.light_random_size_min, tmg_cam_vars.light_random_size_max)
+
+        if light.type == "SPOT":
+            light.spot_size = uniform(tmg_cam_vars.light_random_size_min, tmg_cam_vars.light_random_size_max)
+            light.spot_blend = uniform(tmg_cam_vars.light_random_size_min, tmg_cam_vars.light_random_size_max)
+
+
+def bench(panel, scene, old_func, title):
+    tmg_cam_vars = scene.tmg_cam_vars
+
+    print(title)
+    print("%10s %14s %14s" % ("lights", "per light (ms)", "batched (ms)"))
+
+    lights = []
+    for count in (10, 1000, 10000):
+        for i in range(len(lights), count):
+            light = bpy.data.lights.new("Bench_Light_%s" % i, 'POINT')
+            scene.collection.objects.link(bpy.data.objects.new("Bench_Light_%s" % i, light))
+            lights.append(light)
+
+        runs = 5
+        old = timeit(lambda: old_func(tmg_cam_vars, lights), number=runs) / runs * 1000
+        new = timeit(lambda: panel._randomize_lights(scene, lights), number=runs) / runs * 1000
+
+        print("%10s %14.3f %14.3f" % (count, old, new))
+
+    ## Type changes replace the RNA subtype, so every light must still take
+    ## the size properties of the type it ended up with
+    if tmg_cam_vars.light_random_type:
+        for light in lights:
+            light = bpy.data.lights[light.name_full]
+            for prop in panel.light_random_size_props.get(light.type, ()):
+                getattr(light, prop)
+
+    for light in lights:
+        bpy.data.objects.remove(bpy.data.objects[light.name_full])
+        bpy.data.lights.remove(bpy.data.lights[light.name_full])
+
+
+def main():
+    panel = load_addon()
+    scene = bpy.context.scene
+    tmg_cam_vars = scene.tmg_cam_vars
+
+    for toggle in ("light_random_color", "light_random_energy", "light_random_diffuse", "light_random_specular", "light_random_volume", "light_random_size"):
+        setattr(tmg_cam_vars, toggle, True)
+
+    bench(panel, scene, per_light, "Values")
+
+    for toggle in ("light_random_color", "light_random_energy", "light_random_diffuse", "light_random_specular", "light_random_volume"):
+        setattr(tmg_cam_vars, toggle, False)
+
+    for toggle in ("light_random_type", "light_random_type_point", "light_random_type_spot", "light_random_type_area"):
+        setattr(tmg_cam_vars, toggle, True)
+
+    print()
+    bench(panel, scene, per_light_type, "Type + size")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+# Render performance regression benchmark, CPU only
+#
+# Run with:
+#   blender -b --factory-startup --python benchmarks/bench_render_settings.py -- [--output results.jsonl] [--baseline old.jsonl] [--tolerance 0.15] [--repeats 2]
+#
+# Builds a few reference scenes, renders them with fixed seeds while sweeping
+# the settings the add-on exposes one at a time, and prints one JSON record per
+# render. With --baseline the run exits with code 1 when any case is slower
+# than the baseline by more than the tolerance.
+
+import bpy, sys, os, json, time, platform, argparse, importlib.util
+
+
+def load_addon_version():
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    spec = importlib.util.spec_from_file_location("tmg_cam_tools", os.path.join(root, "__init__.py"), submodule_search_locations=[root])
+    addon = importlib.util.module_from_spec(spec)
+    sys.modules["tmg_cam_tools"] = addon
+    spec.loader.exec_module(addon)
+    return ".".join(str(part) for part in addon.bl_info["version"])
+
+
+def parse_args():
+    argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    parser = argparse.ArgumentParser(prog="bench_render_settings")
+    parser.add_argument("--output", default="")
+    parser.add_argument("--baseline", default="")
+    parser.add_argument("--tolerance", type=float, default=0.15)
+    parser.add_argument("--repeats", type=int, default=2)
+    parser.add_argument("--resolution", type=int, default=256)
+    parser.add_argument("--samples", type=int, default=64)
+    return parser.parse_args(argv)
+
+
+## Reference scenes
+
+def new_scene(name):
+    scene = bpy.data.scenes.new(name)
+
+    cam = bpy.data.objects.new(name + "_Cam", bpy.data.cameras.new(name + "_Cam"))
+    cam.location = (0.0, -12.0, 6.0)
+    cam.rotation_euler = (1.1, 0.0, 0.0)
+    scene.collection.objects.link(cam)
+    scene.camera = cam
+
+    sun = bpy.data.objects.new(name + "_Sun", bpy.data.lights.new(name + "_Sun", 'SUN'))
+    sun.rotation_euler = (0.6, 0.2, 0.0)
+    scene.collection.objects.link(sun)
+
+    world = bpy.data.worlds.new(name + "_World")
+    world.color = (0.05, 0.05, 0.05)
+    scene.world = world
+    return scene
+
+
+def material(name, color, roughness=0.5, transmission=0.0):
+    mat = bpy.data.materials.new(name)
+    mat.use_nodes = True
+    bsdf = mat.node_tree.nodes.get("Principled BSDF")
+    bsdf.inputs["Base Color"].default_value = color
+    bsdf.inputs["Roughness"].default_value = roughness
+
+    for socket in ("Transmission", "Transmission Weight"):
+        if socket in bsdf.inputs:
+            bsdf.inputs[socket].default_value = transmission
+    return mat
+
+
+def add_mesh(scene, name, mesh, location, mat):
+    ob = bpy.data.objects.new(name, mesh)
+    ob.location = location
+    ob.data.materials.append(mat)
+    scene.collection.objects.link(ob)
+    return ob
+
+
+def sphere_mesh(name, segments=32, rings=16):
+    import bmesh
+    mesh = bpy.data.meshes.new(name)
+    bm = bmesh.new()
+    bmesh.ops.create_uvsphere(bm, u_segments=segments, v_segments=rings, radius=0.5)
+    bm.to_mesh(mesh)
+    bm.free()
+    return mesh
+
+
+def cube_mesh(name):
+    import bmesh
+    mesh = bpy.data.meshes.new(name)
+    bm = bmesh.new()
+    bmesh.ops.create_cube(bm, size=1.0)
+    bm.to_mesh(mesh)
+    bm.free()
+    return mesh
+
+
+def build_spheres():
+    ## Diffuse / glossy mix, mostly shading cost
+    scene = new_scene("Bench_Spheres")
+    mesh = sphere_mesh("Bench_Sphere")
+    mats = [material("Bench_Diffuse", (0.8, 0.2, 0.2, 1.0), 0.9), material("Bench_Glossy", (0.2, 0.2, 0.8, 1.0), 0.1)]
+
+    for x in range(-4, 5):
+        for y in range(-4, 5):
+            add_mesh(scene, "Bench_Sphere_%s_%s" %(x, y), mesh, (x * 1.2, y * 1.2, 0.5), mats[(x + y) % 2])
+
+    add_mesh(scene, "Bench_Floor", cube_mesh("Bench_Floor"), (0.0, 0.0, -0.5), mats[0]).scale = (20.0, 20.0, 0.1)
+    return scene
+
+
+def build_instances():
+    ## Many objects, mostly sync / BVH cost
+    scene = new_scene("Bench_Instances")
+    mesh = cube_mesh("Bench_Cube")
+    mat = material("Bench_Grey", (0.6, 0.6, 0.6, 1.0))
+
+    for i in range(2500):
+        x, y = i % 50, i // 50
+        add_mesh(scene, "Bench_Cube_%s" %i, mesh, (x * 0.4 - 10.0, y * 0.4 - 10.0, (x * y) % 7 * 0.1), mat).scale = (0.15, 0.15, 0.15)
+    return scene
+
+
+def build_glass():
+    ## Transmission heavy, mostly sampling / bounce cost
+    scene = new_scene("Bench_Glass")
+    mesh = sphere_mesh("Bench_Glass_Sphere", 64, 32)
+    glass = material("Bench_Glass", (1.0, 1.0, 1.0, 1.0), 0.0, 1.0)
+    floor = material("Bench_Floor_Mat", (0.8, 0.8, 0.8, 1.0))
+
+    for i in range(5):
+        add_mesh(scene, "Bench_Glass_%s" %i, mesh, (i * 1.5 - 3.0, 0.0, 0.5), glass).scale = (1.4, 1.4, 1.4)
+
+    add_mesh(scene, "Bench_Glass_Floor", cube_mesh("Bench_Glass_Floor"), (0.0, 0.0, -0.5), floor).scale = (20.0, 20.0, 0.1)
+    return scene
+
+
+## Settings sweep, each case changes one thing from the baseline
+
+def base_settings(args):
+    return {
+        "tiles" : 2048,
+        "threads" : 0,
+        "persistent" : False,
+        "denoiser" : "",
+        "adaptive" : False,
+        "samples" : args.samples,
+    }
+
+
+def sweep_cases(args):
+    base = base_settings(args)
+    cases = [("baseline", base)]
+
+    for tiles in (64, 256, 0):
+        cases.append(("tiles_%s" %(tiles or "off"), dict(base, tiles=tiles)))
+
+    for threads in (1, 2, 4):
+        cases.append(("threads_%s" %threads, dict(base, threads=threads)))
+
+    cases.append(("persistent_data", dict(base, persistent=True)))
+    cases.append(("denoise_oidn", dict(base, denoiser="OPENIMAGEDENOISE")))
+    cases.append(("adaptive", dict(base, adaptive=True)))
+    return cases
+
+
+def apply_settings(scene, settings, resolution):
+    rd = scene.render
+    cscene = scene.cycles
+
+    rd.engine = "CYCLES"
+    rd.resolution_x = resolution
+    rd.resolution_y = resolution
+    rd.resolution_percentage = 100
+    rd.use_persistent_data = settings["persistent"]
+
+    if settings["threads"]:
+        rd.threads_mode = 'FIXED'
+        rd.threads = settings["threads"]
+    else:
+        rd.threads_mode = 'AUTO'
+
+    cscene.device = 'CPU'
+    cscene.seed = 0
+    cscene.use_animated_seed = False
+    cscene.samples = settings["samples"]
+    cscene.use_adaptive_sampling = settings["adaptive"]
+    cscene.use_denoising = bool(settings["denoiser"])
+    if settings["denoiser"]:
+        cscene.denoiser = settings["denoiser"]
+
+    if hasattr(cscene, "use_auto_tile"):
+        cscene.use_auto_tile = bool(settings["tiles"])
+        if settings["tiles"]:
+            cscene.tile_size = settings["tiles"]
+
+
+def force_cpu():
+    prefs = bpy.context.preferences.addons.get("cycles")
+    if prefs:
+        prefs.preferences.compute_device_type = 'NONE'
+
+
+def render(scene):
+    start = time.perf_counter()
+    bpy.ops.render.render(scene=scene.name)
+    return time.perf_counter() - start
+
+
+def load_baseline(path):
+    baseline = {}
+    with open(path) as results:
+        for line in results:
+            record = json.loads(line)
+            baseline[(record["scene"], record["case"], record["repeat"])] = record["seconds"]
+    return baseline
+
+
+def main():
+    args = parse_args()
+    force_cpu()
+
+    info = {
+        "blender" : bpy.app.version_string,
+        "build_hash" : bpy.app.build_hash.decode() if isinstance(bpy.app.build_hash, bytes) else bpy.app.build_hash,
+        "addon" : load_addon_version(),
+        "machine" : platform.machine(),
+        "cpu_count" : os.cpu_count(),
+    }
+
+    baseline = load_baseline(args.baseline) if args.baseline else {}
+    output = open(args.output, "w") if args.output else None
+    regressions = []
+
+    for scene in (build_spheres(), build_instances(), build_glass()):
+        for case, settings in sweep_cases(args):
+            apply_settings(scene, settings, args.resolution)
+
+            ## Repeats matter for persistent data, only the later renders reuse the scene
+            for repeat in range(args.repeats):
+                seconds = render(scene)
+                record = dict(info, scene=scene.name, case=case, repeat=repeat, seconds=round(seconds, 4), settings=settings)
+
+                old = baseline.get((scene.name, case, repeat))
+                if old:
+                    record["baseline"] = old
+                    record["change"] = round(seconds / old - 1.0, 4)
+                    if record["change"] > args.tolerance:
+                        regressions.append(record)
+
+                line = json.dumps(record)
+                print("TMG_BENCH " + line, flush=True)
+                if output:
+                    output.write(line + "\n")
+
+    if output:
+        output.close()
+
+    for record in regressions:
+        print("TMG_BENCH regression %s / %s / %s : %.3fs -> %.3fs (%+.1f%%)" %(record["scene"], record["case"], record["repeat"], record["baseline"], record["seconds"], record["change"] * 100))
+
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()